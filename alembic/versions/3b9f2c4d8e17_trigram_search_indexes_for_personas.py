@@ -0,0 +1,53 @@
+"""Trigram search indexes for personas (nombre, apellido, RUT)
+
+Revision ID: 3b9f2c4d8e17
+Revises: adfaa079db19
+Create Date: 2025-09-08 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3b9f2c4d8e17'
+down_revision: Union[str, Sequence[str], None] = 'adfaa079db19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() no es IMMUTABLE; este envoltorio permite usarlo en índices de expresión
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT public.unaccent('public.unaccent', $1) $$"
+    )
+    op.execute(
+        "CREATE INDEX ix_per_mayores_nombre_trgm ON per_mayores "
+        "USING gin (lower(f_unaccent(per_nombre)) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_per_mayores_apellido_trgm ON per_mayores "
+        "USING gin (lower(f_unaccent(per_apellido)) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_per_mayores_rut_trgm ON per_mayores "
+        "USING gin (upper(replace(replace(per_rut, '.', ''), '-', '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_per_mayores_rut_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_per_mayores_apellido_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_per_mayores_nombre_trgm")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,44 @@
+"""Add per_ultima_atencion to per_mayores
+
+Revision ID: 7c2e5b8f1a36
+Revises: d4e7a1c9b2f5
+Create Date: 2025-09-10 11:23:54.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7c2e5b8f1a36'
+down_revision: Union[str, Sequence[str], None] = 'd4e7a1c9b2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('per_mayores', sa.Column('per_ultima_atencion', sa.Date(), nullable=True))
+    # Relleno inicial; después se puede reconstruir con rebuild_ultima_atencion.py
+    op.execute(
+        "UPDATE per_mayores SET per_ultima_atencion = "
+        "(SELECT max(at_fecha) FROM at_atenciones WHERE at_atenciones.at_perid = per_mayores.id)"
+    )
+    # Mismo orden que el reporte (nunca atendidas primero); SQLite no acepta NULLS FIRST en índices
+    # pero ya ordena los NULL al principio
+    if op.get_bind().dialect.name == "postgresql":
+        columnas = [sa.text('per_ultima_atencion ASC NULLS FIRST'), 'id']
+    else:
+        columnas = ['per_ultima_atencion', 'id']
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_per_mayores_ultima_atencion', 'per_mayores', columnas,
+            if_not_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_per_mayores_ultima_atencion', table_name='per_mayores', if_exists=True)
+    op.drop_column('per_mayores', 'per_ultima_atencion')
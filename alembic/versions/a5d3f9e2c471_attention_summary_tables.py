@@ -0,0 +1,55 @@
+"""Per-persona attention summary tables
+
+Revision ID: a5d3f9e2c471
+Revises: 7c2e5b8f1a36
+Create Date: 2025-09-11 16:05:37.218649
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a5d3f9e2c471'
+down_revision: Union[str, Sequence[str], None] = '7c2e5b8f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'res_atenciones_persona',
+        sa.Column('rap_perid', sa.Integer(), nullable=False),
+        sa.Column('rap_total', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['rap_perid'], ['per_mayores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('rap_perid')
+    )
+    op.create_table(
+        'res_atenciones_especialidad',
+        sa.Column('rae_perid', sa.Integer(), nullable=False),
+        sa.Column('rae_espeid', sa.Integer(), nullable=False),
+        sa.Column('rae_total', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['rae_perid'], ['per_mayores.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['rae_espeid'], ['espe_especialidades.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('rae_perid', 'rae_espeid')
+    )
+    # Relleno inicial; después se puede reconstruir con rebuild_resumen_atenciones.py
+    op.execute(
+        "INSERT INTO res_atenciones_persona (rap_perid, rap_total) "
+        "SELECT at_perid, count(*) FROM at_atenciones WHERE at_perid IS NOT NULL GROUP BY at_perid"
+    )
+    op.execute(
+        "INSERT INTO res_atenciones_especialidad (rae_perid, rae_espeid, rae_total) "
+        "SELECT a.at_perid, e.esp_espeid, count(*) FROM at_atenciones a "
+        "JOIN esp_especialistas e ON e.id = a.at_espid "
+        "WHERE a.at_perid IS NOT NULL AND e.esp_espeid IS NOT NULL "
+        "GROUP BY a.at_perid, e.esp_espeid"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('res_atenciones_especialidad')
+    op.drop_table('res_atenciones_persona')
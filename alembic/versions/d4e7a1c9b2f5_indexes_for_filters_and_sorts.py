@@ -0,0 +1,51 @@
+"""Indexes for foreign keys and date columns used in filters and sorts
+
+Revision ID: d4e7a1c9b2f5
+Revises: 3b9f2c4d8e17
+Create Date: 2025-09-09 09:41:06.512730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd4e7a1c9b2f5'
+down_revision: Union[str, Sequence[str], None] = '3b9f2c4d8e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Deben coincidir con los Index declarados en app/models/personas_mayores.py (ver check_indexes.py)
+INDICES = [
+    ("ix_at_atenciones_perid_fecha", "at_atenciones", ["at_perid", sa.text("at_fecha DESC"), sa.text("id DESC")]),
+    ("ix_at_atenciones_espid_fecha", "at_atenciones", ["at_espid", "at_fecha"]),
+    ("ix_at_atenciones_fecha", "at_atenciones", ["at_fecha", "id"]),
+    ("ix_per_mayores_macid", "per_mayores", ["per_macid"]),
+    ("ix_per_mayores_genid", "per_mayores", ["per_genid"]),
+    ("ix_per_mayores_apellido_nombre", "per_mayores", ["per_apellido", "per_nombre", "id"]),
+    ("ix_esp_especialistas_espeid", "esp_especialistas", ["esp_espeid"]),
+    ("ix_esp_especialistas_apellido_nombre", "esp_especialistas", ["esp_apellido", "esp_nombre", "id"]),
+    ("ix_act_actividades_fecha", "act_actividades", ["act_fecha", "id"]),
+    ("ix_via_viajes_fecha", "via_viajes", ["via_fecha", "id"]),
+    ("ix_actividades_asist_actid", "actividades_asist", ["actasist_actid"]),
+    ("ix_talleres_asist_talid", "talleres_asist", ["talasist_talid"]),
+    ("ix_viajes_asist_viaid", "viajes_asist", ["viaasist_viaid"]),
+    ("ix_membresias_org_orgid", "membresias_org", ["memorg_orgid"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY (solo PostgreSQL) no bloquea escrituras, pero no puede ir dentro de una transacción
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(nombre, tabla, columnas, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, if_exists=True, postgresql_concurrently=True)
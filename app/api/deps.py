@@ -4,13 +4,14 @@ from jose import JWTError, jwt
 from typing import Optional
 from app.database import get_db
 from app.models.user import User
+from app.crud import user as crud_user
 from app.config import settings
 
 
 def get_current_user(
     access_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
-) -> User:
+) -> crud_user.UsuarioSesion:
     """
     Obtiene el usuario actual basado en el token JWT en las cookies
     """
@@ -31,7 +32,7 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.usr == username).first()
+    user = crud_user.get_session_user(db, username)
     if user is None:
         raise credentials_exception
     
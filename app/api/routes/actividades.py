@@ -1,37 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import actividades
 from app.schemas.actividades import ActividadCreate, ActividadUpdate
 from app.models.user import User
+from app.plantillas import renderizar_lista, templates
 from .auth import get_current_user
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
 async def lista_actividades(
     request: Request, 
     page: int = 1, 
+    cursor: Optional[str] = None,
     search: str = "",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Lista de actividades con paginación y búsqueda."""
     per_page = 10
     skip = (page - 1) * per_page
     
-    actividades_list = actividades.get_actividades(db, skip=skip, limit=per_page, search=search if search else None)
-    total = actividades.count_actividades(db, search=search if search else None)
+    actividades_list = await actividades.get_actividades_async(db, skip=skip, limit=per_page, search=search if search else None, cursor=cursor, con_total=True)
+    total = actividades_list.total
     total_pages = (total + per_page - 1) // per_page
     
-    return templates.TemplateResponse("actividades/lista.html", {
+    return renderizar_lista(request, "actividades/lista.html", {
         "request": request,
         "actividades": actividades_list,
         "current_page": page,
@@ -62,7 +62,7 @@ async def crear_actividad(
     request: Request,
     act_actividad: str = Form(...),
     act_fecha: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Crear nueva actividad."""
@@ -75,7 +75,7 @@ async def crear_actividad(
             act_actividad=act_actividad,
             act_fecha=fecha_obj
         )
-        actividades.create_actividad(db, actividad_data)
+        await actividades.create_actividad_async(db, actividad_data)
         return RedirectResponse(url="/actividades/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
         return templates.TemplateResponse("actividades/formulario.html", {
@@ -90,11 +90,11 @@ async def crear_actividad(
 async def editar_actividad_form(
     actividad_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Formulario para editar actividad."""
-    actividad = actividades.get_actividad(db, actividad_id)
+    actividad = await actividades.get_actividad_async(db, actividad_id)
     if not actividad:
         raise HTTPException(status_code=404, detail="Actividad no encontrada")
     
@@ -112,7 +112,7 @@ async def editar_actividad(
     request: Request,
     act_actividad: str = Form(...),
     act_fecha: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Editar actividad existente."""
@@ -125,7 +125,7 @@ async def editar_actividad(
             act_actividad=act_actividad,
             act_fecha=fecha_obj
         )
-        actividades.update_actividad(db, actividad_id, actividad_data)
+        await actividades.update_actividad_async(db, actividad_id, actividad_data)
         return RedirectResponse(url="/actividades/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
         return templates.TemplateResponse("actividades/formulario.html", {
@@ -140,9 +140,9 @@ async def editar_actividad(
 @router.post("/{actividad_id}/eliminar")
 async def eliminar_actividad(
     actividad_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Eliminar actividad."""
-    actividades.delete_actividad(db, actividad_id)
+    await actividades.delete_actividad_async(db, actividad_id)
     return RedirectResponse(url="/actividades/", status_code=status.HTTP_303_SEE_OTHER)
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Literal
+from ...database import get_db
+from ...crud import asistencias as crud_asistencias
+from ...crud import personas_mayores as crud_pm
+from ...schemas.asistencias import (
+    RegistroAsistencias, ResultadoAsistencias, Asistente, AsistenciaPersona)
+from .auth import get_current_user
+
+router = APIRouter(prefix="/asistencias", tags=["asistencias"])
+
+TipoEvento = Literal["actividades", "talleres", "viajes"]
+
+@router.get("/persona/{persona_id}", response_model=List[AsistenciaPersona])
+def asistencias_persona(
+    persona_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Actividades, talleres y viajes de una persona"""
+    asistencias = crud_asistencias.get_asistencias_persona(db, persona_id)
+    if not asistencias and not crud_pm.get_persona_mayor(db, persona_id):
+        raise HTTPException(status_code=404, detail="Persona no encontrada")
+    return asistencias
+
+@router.get("/{tipo}/{evento_id}", response_model=List[Asistente])
+def asistentes_evento(
+    tipo: TipoEvento,
+    evento_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Personas inscritas en el evento"""
+    asistentes = crud_asistencias.get_asistentes(db, tipo, evento_id)
+    if not asistentes and not crud_asistencias.evento_existe(db, tipo, evento_id):
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    return asistentes
+
+@router.post("/{tipo}/{evento_id}", response_model=ResultadoAsistencias)
+def registrar_asistencias(
+    tipo: TipoEvento,
+    evento_id: int,
+    registro: RegistroAsistencias,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Inscribe una lista de personas en el evento en una sola sentencia"""
+    registradas = crud_asistencias.registrar_asistencias(db, tipo, evento_id, registro.persona_ids)
+    # Solo si no se agregó nadie hace falta distinguir un evento inexistente
+    if not registradas and not crud_asistencias.evento_existe(db, tipo, evento_id):
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    agregadas = set(registradas)
+    return ResultadoAsistencias(
+        registradas=registradas,
+        omitidas=sorted(set(registro.persona_ids) - agregadas)
+    )
+
+@router.delete("/{tipo}/{evento_id}/{persona_id}", status_code=204)
+def eliminar_asistencia(
+    tipo: TipoEvento,
+    evento_id: int,
+    persona_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    if not crud_asistencias.eliminar_asistencia(db, tipo, evento_id, persona_id):
+        raise HTTPException(status_code=404, detail="Asistencia no encontrada")
@@ -1,16 +1,15 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import Optional
 from ...database import get_db
 from ...crud import personas_mayores as crud_pm
 from ...schemas.personas_mayores import AtencionCreate
+from ...plantillas import es_fragmento, renderizar_lista, templates
 from .auth import get_current_user
 
 router = APIRouter(prefix="/atenciones", tags=["atenciones"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 def listar_atenciones(
@@ -21,26 +20,29 @@ def listar_atenciones(
     especialista_id: Optional[int] = Query(None),
     fecha_desde: Optional[date] = Query(None),
     fecha_hasta: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     atenciones = crud_pm.get_atenciones(
         db, skip=skip, limit=limit,
         persona_id=persona_id, especialista_id=especialista_id,
-        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+        cursor=cursor
     )
     
-    # Para filtros
-    especialistas = crud_pm.get_especialistas(db)
+    # Para filtros (el fragmento de htmx no los muestra)
+    especialistas = [] if es_fragmento(request.headers) else crud_pm.get_especialistas(db)
     
-    return templates.TemplateResponse("atenciones/lista.html", {
+    return renderizar_lista(request, "atenciones/lista.html", {
         "request": request,
         "atenciones": atenciones,
         "especialistas": especialistas,
         "persona_id": persona_id,
         "especialista_id": especialista_id,
         "fecha_desde": fecha_desde,
-        "fecha_hasta": fecha_hasta
+        "fecha_hasta": fecha_hasta,
+        "limit": limit
     })
 
 @router.get("/nueva", response_class=HTMLResponse)
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
@@ -9,9 +8,9 @@ from ...database import get_db
 from ...crud import user as crud_user
 from ...schemas.user import UserLogin
 from ...config import settings
+from ...plantillas import templates
 
 router = APIRouter(tags=["auth"])
-templates = Jinja2Templates(directory="app/templates")
 security = HTTPBearer(auto_error=False)
 
 SECRET_KEY = settings.SECRET_KEY
@@ -40,8 +39,7 @@ def get_current_user_from_cookie(request: Request, db: Session = Depends(get_db)
         if username is None:
             return None
         
-        user = crud_user.get_user_by_username(db, username=username)
-        return user
+        return crud_user.get_session_user(db, username)
     except JWTError:
         return None
 
@@ -60,13 +58,13 @@ def login_form(request: Request):
     return templates.TemplateResponse("auth/login.html", {"request": request})
 
 @router.post("/login")
-def login(
+async def login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    user = crud_user.authenticate_user(db, username, password)
+    user = await crud_user.authenticate_user_async(db, username, password)
     if not user:
         return templates.TemplateResponse("auth/login.html", {
             "request": request,
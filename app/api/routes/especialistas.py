@@ -1,36 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import especialistas
 from app.schemas.especialistas import EspecialistaCreate, EspecialistaUpdate
 from app.models.user import User
+from app.plantillas import renderizar_lista, templates
 from .auth import get_current_user
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
 async def lista_especialistas(
     request: Request, 
     page: int = 1, 
+    cursor: Optional[str] = None,
     search: str = "",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Lista de especialistas con paginación y búsqueda."""
     per_page = 10
     skip = (page - 1) * per_page
     
-    especialistas_list = especialistas.get_especialistas(db, skip=skip, limit=per_page, search=search if search else None)
-    total = especialistas.count_especialistas(db, search=search if search else None)
+    especialistas_list = await especialistas.get_especialistas_async(db, skip=skip, limit=per_page, search=search if search else None, cursor=cursor, con_total=True)
+    total = especialistas_list.total
     total_pages = (total + per_page - 1) // per_page
     
-    return templates.TemplateResponse("especialistas/lista.html", {
+    return renderizar_lista(request, "especialistas/lista.html", {
         "request": request,
         "especialistas": especialistas_list,
         "current_page": page,
@@ -44,12 +44,12 @@ async def lista_especialistas(
 @router.get("/crear", response_class=HTMLResponse)
 async def crear_especialista_form(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Formulario para crear nuevo especialista."""
     from app.crud import especialidades
-    especialidades_list = especialidades.get_especialidades(db, skip=0, limit=100)
+    especialidades_list = await especialidades.get_especialidades_async(db, skip=0, limit=100)
     
     return templates.TemplateResponse("especialistas/formulario.html", {
         "request": request,
@@ -66,7 +66,7 @@ async def crear_especialista(
     esp_nombre: str = Form(...),
     esp_apellido: str = Form(...),
     esp_espeid: Optional[int] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Crear nuevo especialista."""
@@ -77,11 +77,11 @@ async def crear_especialista(
             esp_apellido=esp_apellido,
             esp_espeid=esp_espeid
         )
-        especialistas.create_especialista(db, especialista_data)
+        await especialistas.create_especialista_async(db, especialista_data)
         return RedirectResponse(url="/especialistas/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
         from app.crud import especialidades
-        especialidades_list = especialidades.get_especialidades(db, skip=0, limit=100)
+        especialidades_list = await especialidades.get_especialidades_async(db, skip=0, limit=100)
         
         return templates.TemplateResponse("especialistas/formulario.html", {
             "request": request,
@@ -96,16 +96,16 @@ async def crear_especialista(
 async def editar_especialista_form(
     especialista_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Formulario para editar especialista."""
-    especialista = especialistas.get_especialista(db, especialista_id)
+    especialista = await especialistas.get_especialista_async(db, especialista_id)
     if not especialista:
         raise HTTPException(status_code=404, detail="Especialista no encontrado")
     
-    from app.crud.especialidades import get_especialidades
-    especialidades_list = get_especialidades(db)
+    from app.crud.especialidades import get_especialidades_async
+    especialidades_list = await get_especialidades_async(db)
     return templates.TemplateResponse("especialistas/formulario.html", {
         "request": request,
         "user": current_user,
@@ -123,7 +123,7 @@ async def editar_especialista(
     esp_nombre: str = Form(...),
     esp_apellido: str = Form(...),
     esp_espeid: Optional[int] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Actualizar especialista."""
@@ -134,12 +134,12 @@ async def editar_especialista(
             esp_apellido=esp_apellido,
             esp_espeid=esp_espeid
         )
-        especialistas.update_especialista(db, especialista_id, especialista_update)
+        await especialistas.update_especialista_async(db, especialista_id, especialista_update)
         return RedirectResponse(url="/especialistas/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
-        especialista = especialistas.get_especialista(db, especialista_id)
-        from app.crud.especialidades import get_especialidades
-        especialidades_list = get_especialidades(db)
+        especialista = await especialistas.get_especialista_async(db, especialista_id)
+        from app.crud.especialidades import get_especialidades_async
+        especialidades_list = await get_especialidades_async(db)
         return templates.TemplateResponse("especialistas/formulario.html", {
             "request": request,
             "user": current_user,
@@ -153,9 +153,9 @@ async def editar_especialista(
 @router.post("/{especialista_id}/eliminar")
 async def eliminar_especialista(
     especialista_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Eliminar especialista."""
-    especialistas.delete_especialista(db, especialista_id)
+    await especialistas.delete_especialista_async(db, especialista_id)
     return RedirectResponse(url="/especialistas/", status_code=status.HTTP_303_SEE_OTHER)
@@ -1,36 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import organizaciones
 from app.schemas.organizaciones import OrganizacionCreate, OrganizacionUpdate
 from app.models.user import User
+from app.plantillas import renderizar_lista, templates
 from .auth import get_current_user
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
 async def lista_organizaciones(
     request: Request, 
     page: int = 1, 
+    cursor: Optional[str] = None,
     search: str = "",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Lista de organizaciones con paginación y búsqueda."""
     per_page = 10
     skip = (page - 1) * per_page
     
-    organizaciones_list = organizaciones.get_organizaciones(db, skip=skip, limit=per_page, search=search if search else None)
-    total = organizaciones.count_organizaciones(db, search=search if search else None)
+    organizaciones_list = await organizaciones.get_organizaciones_async(db, skip=skip, limit=per_page, search=search if search else None, cursor=cursor, con_total=True)
+    total = organizaciones_list.total
     total_pages = (total + per_page - 1) // per_page
     
-    return templates.TemplateResponse("organizaciones/lista.html", {
+    return renderizar_lista(request, "organizaciones/lista.html", {
         "request": request,
         "organizaciones": organizaciones_list,
         "current_page": page,
@@ -58,13 +58,13 @@ async def crear_organizacion_form(
 async def crear_organizacion(
     request: Request,
     org_comunitaria: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Crear nueva organización."""
     try:
         organizacion_data = OrganizacionCreate(org_comunitaria=org_comunitaria)
-        organizaciones.create_organizacion(db, organizacion_data)
+        await organizaciones.create_organizacion_async(db, organizacion_data)
         return RedirectResponse(url="/organizaciones/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
         return templates.TemplateResponse("organizaciones/formulario.html", {
@@ -79,11 +79,11 @@ async def crear_organizacion(
 async def editar_organizacion_form(
     organizacion_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Formulario para editar organización."""
-    organizacion = organizaciones.get_organizacion(db, organizacion_id)
+    organizacion = await organizaciones.get_organizacion_async(db, organizacion_id)
     if not organizacion:
         raise HTTPException(status_code=404, detail="Organización no encontrada")
     
@@ -100,16 +100,16 @@ async def editar_organizacion(
     organizacion_id: int,
     request: Request,
     org_comunitaria: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Actualizar organización."""
     try:
         organizacion_update = OrganizacionUpdate(org_comunitaria=org_comunitaria)
-        organizaciones.update_organizacion(db, organizacion_id, organizacion_update)
+        await organizaciones.update_organizacion_async(db, organizacion_id, organizacion_update)
         return RedirectResponse(url="/organizaciones/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
-        organizacion = organizaciones.get_organizacion(db, organizacion_id)
+        organizacion = await organizaciones.get_organizacion_async(db, organizacion_id)
         return templates.TemplateResponse("organizaciones/formulario.html", {
             "request": request,
             "user": current_user,
@@ -122,9 +122,9 @@ async def editar_organizacion(
 @router.post("/{organizacion_id}/eliminar")
 async def eliminar_organizacion(
     organizacion_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Eliminar organización."""
-    organizaciones.delete_organizacion(db, organizacion_id)
+    await organizaciones.delete_organizacion_async(db, organizacion_id)
     return RedirectResponse(url="/organizaciones/", status_code=status.HTTP_303_SEE_OTHER)
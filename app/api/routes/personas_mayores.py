@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query, File, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import date, datetime
+import io
 from typing import Optional
 from ...database import get_db
 from ...crud import personas_mayores as crud_pm
+from ...crud import importacion
+from ...crud import fichas as crud_fichas
 from ...schemas.personas_mayores import PersonaMayorCreate, PersonaMayorUpdate
+from ...plantillas import es_fragmento, renderizar_lista, templates
 from .auth import get_current_user
 
 router = APIRouter(prefix="/personas", tags=["personas_mayores"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 def listar_personas(
@@ -20,19 +22,24 @@ def listar_personas(
     search: Optional[str] = Query(None),
     macrosector_id: Optional[int] = Query(None),
     genero_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     personas = crud_pm.get_personas_mayores(
         db, skip=skip, limit=limit, 
-        search=search, macrosector_id=macrosector_id, genero_id=genero_id
+        search=search, macrosector_id=macrosector_id, genero_id=genero_id,
+        cursor=cursor
     )
     
-    # Para filtros
-    generos = crud_pm.get_generos(db)
-    macrosectores = crud_pm.get_macrosectores(db)
+    # Para filtros (el fragmento de htmx no los muestra)
+    if es_fragmento(request.headers):
+        generos, macrosectores = [], []
+    else:
+        generos = crud_pm.get_generos(db)
+        macrosectores = crud_pm.get_macrosectores(db)
     
-    return templates.TemplateResponse("personas/lista.html", {
+    return renderizar_lista(request, "personas/lista.html", {
         "request": request,
         "personas": personas,
         "generos": generos,
@@ -118,6 +125,42 @@ def crear_persona(
             "error": str(e)
         })
 
+@router.get("/importar", response_class=HTMLResponse)
+def importar_personas_form(
+    request: Request,
+    current_user = Depends(get_current_user)
+):
+    return templates.TemplateResponse("personas/importar.html", {
+        "request": request,
+        "columnas": list(importacion.COLUMNAS_IMPORTACION) + list(importacion.REFERENCIAS_IMPORTACION),
+        "resultado": None
+    })
+
+@router.post("/importar", response_class=HTMLResponse)
+def importar_personas(
+    request: Request,
+    archivo: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    resultado = None
+    error = None
+    # utf-8-sig descarta el BOM que agrega Excel
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    try:
+        resultado = importacion.importar_personas_csv(db, texto)
+    except ValueError as e:
+        error = str(e)
+    finally:
+        texto.detach()
+
+    return templates.TemplateResponse("personas/importar.html", {
+        "request": request,
+        "columnas": list(importacion.COLUMNAS_IMPORTACION) + list(importacion.REFERENCIAS_IMPORTACION),
+        "resultado": resultado,
+        "error": error
+    })
+
 @router.get("/{persona_id}", response_class=HTMLResponse)
 def detalle_persona(
     persona_id: int,
@@ -125,20 +168,18 @@ def detalle_persona(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    persona = crud_pm.get_persona_mayor(db, persona_id)
+    # Persona, últimas atenciones y participación en una sola consulta
+    persona = crud_fichas.get_ficha_persona(db, persona_id)
     if not persona:
         raise HTTPException(status_code=404, detail="Persona no encontrada")
     
-    # Obtener últimas atenciones
-    atenciones = crud_pm.get_atenciones_persona(db, persona_id, limit=5)
-    
     # Calcular edad
     edad = crud_pm.calcular_edad(persona.per_birthdate)
     
     return templates.TemplateResponse("personas/detalle.html", {
         "request": request,
         "persona": persona,
-        "atenciones": atenciones,
+        "atenciones": persona.atenciones,
         "edad": edad
     })
 
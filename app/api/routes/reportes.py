@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, Request, Query
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date
-from typing import Optional
-from ...database import get_db
+from typing import Annotated, Optional
+from urllib.parse import urlencode
+from pydantic import BeforeValidator
+from ...database import get_db, SessionLocal
 from ...crud import personas_mayores as crud_pm
+from ...exportacion import generar_csv, generar_xlsx
+from ...plantillas import templates
 from .auth import get_current_user
 
 router = APIRouter(prefix="/reportes", tags=["reportes"])
-templates = Jinja2Templates(directory="app/templates")
+
+def _vacio_a_none(valor):
+    """Los formularios GET envían '' en los campos que se dejaron sin completar"""
+    return None if valor == "" else valor
+
+# Query() va dentro de Annotated: con `= Query(None)` FastAPI no aplica el BeforeValidator
+EnteroOpcional = Annotated[Optional[int], BeforeValidator(_vacio_a_none), Query()]
+BooleanoOpcional = Annotated[Optional[bool], BeforeValidator(_vacio_a_none), Query()]
 
 @router.get("/", response_class=HTMLResponse)
 def menu_reportes(
@@ -30,15 +40,51 @@ async def estadisticas_generales(db: Session = Depends(get_db)):
 def personas_sin_atencion_reciente(
     request: Request,
     dias: int = Query(90, ge=1, le=365),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    personas = crud_pm.get_personas_sin_atencion_reciente(db, dias)
+    personas = crud_pm.get_personas_sin_atencion_reciente(db, dias, limit=limit, cursor=cursor)
     
     return templates.TemplateResponse("reportes/personas_sin_atencion.html", {
         "request": request,
         "personas": personas,
-        "dias": dias
+        "dias": dias,
+        "limit": limit
+    })
+
+_MEDIA_TYPES_EXPORTACION = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def _filas_reporte_atenciones(año: int, mes: int):
+    # La sesión de get_db se cierra antes de enviar la respuesta; el streaming usa la suya
+    with SessionLocal() as db:
+        yield from crud_pm.iter_reporte_atenciones_mensual(db, año, mes)
+
+@router.get("/atenciones-mensual.{formato}")
+def exportar_atenciones_mensual(
+    formato: str,
+    año: Optional[int] = Query(None, ge=2000, le=2100),
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    current_user = Depends(get_current_user)
+):
+    """Exporta las atenciones de un mes (por defecto el actual) en CSV o XLSX, en streaming"""
+    if formato not in _MEDIA_TYPES_EXPORTACION:
+        raise HTTPException(status_code=404, detail="Formato no soportado")
+    hoy = date.today()
+    año = año or hoy.year
+    mes = mes or hoy.month
+
+    filas = _filas_reporte_atenciones(año, mes)
+    if formato == "xlsx":
+        contenido = generar_xlsx(crud_pm.COLUMNAS_REPORTE_ATENCIONES, filas, hoja=f"Atenciones {mes:02d}-{año}")
+    else:
+        contenido = generar_csv(crud_pm.COLUMNAS_REPORTE_ATENCIONES, filas)
+    return StreamingResponse(contenido, media_type=_MEDIA_TYPES_EXPORTACION[formato], headers={
+        "Content-Disposition": f'attachment; filename="atenciones_{año}_{mes:02d}.{formato}"'
     })
 
 @router.get("/busqueda-avanzada", response_class=HTMLResponse)
@@ -47,28 +93,33 @@ def busqueda_avanzada(
     nombre: Optional[str] = Query(None),
     apellido: Optional[str] = Query(None),
     rut: Optional[str] = Query(None),
-    edad_min: Optional[int] = Query(None),
-    edad_max: Optional[int] = Query(None),
-    macrosector_id: Optional[int] = Query(None),
-    genero_id: Optional[int] = Query(None),
+    edad_min: EnteroOpcional = None,
+    edad_max: EnteroOpcional = None,
+    macrosector_id: EnteroOpcional = None,
+    genero_id: EnteroOpcional = None,
+    con_atenciones: BooleanoOpcional = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    personas = []
+    personas = None
     generos = crud_pm.get_generos(db)
     macrosectores = crud_pm.get_macrosectores(db)
     
     # Solo buscar si hay al menos un filtro
-    if any([nombre, apellido, rut, edad_min, edad_max, macrosector_id, genero_id]):
+    if any([nombre, apellido, rut, macrosector_id, genero_id]) or any(
+            f is not None for f in [edad_min, edad_max, con_atenciones]):
         personas = crud_pm.buscar_personas_avanzado(
             db, nombre=nombre, apellido=apellido, rut=rut,
             edad_min=edad_min, edad_max=edad_max,
-            macrosector_id=macrosector_id, genero_id=genero_id
+            macrosector_id=macrosector_id, genero_id=genero_id,
+            con_atenciones=con_atenciones, skip=skip, limit=limit
         )
     
-    return templates.TemplateResponse("reportes/busqueda_avanzada.html", {
+    contexto = {
         "request": request,
-        "personas": personas,
+        "personas": personas or [],
         "generos": generos,
         "macrosectores": macrosectores,
         "filtros": {
@@ -78,6 +129,13 @@ def busqueda_avanzada(
             "edad_min": edad_min,
             "edad_max": edad_max,
             "macrosector_id": macrosector_id,
-            "genero_id": genero_id
-        }
-    })
\ No newline at end of file
+            "genero_id": genero_id,
+            "con_atenciones": con_atenciones
+        },
+        "skip": skip,
+        "limit": limit,
+        "filtros_qs": urlencode([(k, v) for k, v in request.query_params.multi_items() if k != "skip"])
+    }
+    if personas is not None:
+        contexto["resultados"] = personas
+    return templates.TemplateResponse("reportes/busqueda_avanzada.html", contexto)
\ No newline at end of file
@@ -1,37 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import viajes
 from app.schemas.viajes import ViajeCreate, ViajeUpdate
 from app.models.user import User
+from app.plantillas import renderizar_lista, templates
 from .auth import get_current_user
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
 async def lista_viajes(
     request: Request, 
     page: int = 1, 
+    cursor: Optional[str] = None,
     search: str = "",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Lista de viajes con paginación y búsqueda."""
     per_page = 10
     skip = (page - 1) * per_page
     
-    viajes_list = viajes.get_viajes(db, skip=skip, limit=per_page, search=search if search else None)
-    total = viajes.count_viajes(db, search=search if search else None)
+    viajes_list = await viajes.get_viajes_async(db, skip=skip, limit=per_page, search=search if search else None, cursor=cursor, con_total=True)
+    total = viajes_list.total
     total_pages = (total + per_page - 1) // per_page
     
-    return templates.TemplateResponse("viajes/lista.html", {
+    return renderizar_lista(request, "viajes/lista.html", {
         "request": request,
         "viajes": viajes_list,
         "current_page": page,
@@ -61,7 +61,7 @@ async def crear_viaje(
     via_viaje: str = Form(...),
     via_destino: str = Form(...),
     via_fecha: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Crear nuevo viaje."""
@@ -75,7 +75,7 @@ async def crear_viaje(
             via_destino=via_destino,
             via_fecha=fecha_obj
         )
-        viajes.create_viaje(db, viaje_data)
+        await viajes.create_viaje_async(db, viaje_data)
         return RedirectResponse(url="/viajes/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
         return templates.TemplateResponse("viajes/formulario.html", {
@@ -90,11 +90,11 @@ async def crear_viaje(
 async def editar_viaje_form(
     viaje_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Formulario para editar viaje."""
-    viaje = viajes.get_viaje(db, viaje_id)
+    viaje = await viajes.get_viaje_async(db, viaje_id)
     if not viaje:
         raise HTTPException(status_code=404, detail="Viaje no encontrado")
     
@@ -113,7 +113,7 @@ async def editar_viaje(
     via_viaje: str = Form(...),
     via_destino: str = Form(...),
     via_fecha: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Editar viaje existente."""
@@ -127,7 +127,7 @@ async def editar_viaje(
             via_destino=via_destino,
             via_fecha=fecha_obj
         )
-        viajes.update_viaje(db, viaje_id, viaje_data)
+        await viajes.update_viaje_async(db, viaje_id, viaje_data)
         return RedirectResponse(url="/viajes/", status_code=status.HTTP_303_SEE_OTHER)
     except Exception as e:
         return templates.TemplateResponse("viajes/formulario.html", {
@@ -142,9 +142,9 @@ async def editar_viaje(
 @router.post("/{viaje_id}/eliminar")
 async def eliminar_viaje(
     viaje_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Eliminar viaje."""
-    viajes.delete_viaje(db, viaje_id)
+    await viajes.delete_viaje_async(db, viaje_id)
     return RedirectResponse(url="/viajes/", status_code=status.HTTP_303_SEE_OTHER)
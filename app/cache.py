@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Cache en memoria del proceso, con expiración por tiempo e invalidación explícita"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expira, value = item
+            if expira < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                # Se descarta la entrada más antigua (orden de inserción)
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Invalida una clave, o todo el cache si no se indica ninguna"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,90 @@
+import logging
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .metricas import ruta_actual
+
+# Detector de cargas perezosas: cada relación que se carga a demanda (una sentencia por objeto,
+# el origen típico de un N+1 al recorrer una lista en una plantilla) se registra con la ruta de
+# la petición y la plantilla o función que la provocó. Se consulta en /sistema/cargas-perezosas;
+# con ORM_ESTRICTO esas relaciones lanzan un error en vez de cargarse.
+
+logger = logging.getLogger(__name__)
+
+_MAXIMO = 500
+
+
+class CargaPerezosa:
+    __slots__ = ("ruta", "relacion", "origen", "veces", "ultima")
+
+    def __init__(self, ruta: str, relacion: str, origen: str):
+        self.ruta = ruta
+        self.relacion = relacion
+        self.origen = origen
+        self.veces = 0
+        self.ultima = None
+
+
+class RegistroCargasPerezosas:
+    """Cargas perezosas por (ruta, relación, origen), acotado a `maximo` combinaciones"""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self.limpiar()
+
+    def limpiar(self):
+        with self._lock:
+            self._cargas: Dict[Tuple[str, str, str], CargaPerezosa] = {}
+
+    def registrar(self, ruta: str, relacion: str, origen: str) -> bool:
+        """Suma la carga; devuelve True la primera vez que aparece la combinación"""
+        clave = (ruta, relacion, origen)
+        with self._lock:
+            carga = self._cargas.get(clave)
+            nueva = carga is None
+            if nueva:
+                if len(self._cargas) >= self.maximo:
+                    return False
+                carga = self._cargas[clave] = CargaPerezosa(ruta, relacion, origen)
+            carga.veces += 1
+            carga.ultima = datetime.now()
+            return nueva
+
+    def por_ruta(self) -> List[CargaPerezosa]:
+        """Ordenadas por ruta y, dentro de cada una, por cantidad de cargas"""
+        with self._lock:
+            return sorted(self._cargas.values(), key=lambda c: (c.ruta, -c.veces))
+
+
+registro = RegistroCargasPerezosas(_MAXIMO)
+
+
+def _origen() -> str:
+    """Plantilla (nombre:línea) o función de app/ que accedió a la relación"""
+    frame = sys._getframe(2)
+    respaldo = None
+    while frame is not None:
+        plantilla = frame.f_globals.get("__jinja_template__")
+        if plantilla is not None:
+            return f"{plantilla.name}:{plantilla.get_corresponding_lineno(frame.f_lineno)}"
+        modulo = frame.f_globals.get("__name__", "")
+        if respaldo is None and modulo.startswith("app.") and modulo != __name__:
+            respaldo = f"{modulo}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return respaldo or "desconocido"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _al_ejecutar(orm_execute_state):
+    # Solo las cargas a demanda de un objeto (no selectinload ni las consultas explícitas)
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    relacion = str(orm_execute_state.loader_strategy_path[-1])
+    ruta = ruta_actual() or "sin petición"
+    origen = _origen()
+    if registro.registrar(ruta, relacion, origen):
+        logger.warning("Carga perezosa de %s en %s (%s)", relacion, ruta, origen)
@@ -0,0 +1,190 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+# Registro de consultas lentas (se activa con CONSULTAS_LENTAS_UMBRAL_MS > 0): cada sentencia
+# que supera el umbral se registra con sus parámetros y la función de app/crud/ que la originó.
+# La primera vez que aparece un SELECT lento se guarda su plan (EXPLAIN (ANALYZE, BUFFERS) en
+# PostgreSQL, EXPLAIN QUERY PLAN en SQLite); las siguientes solo suman tiempos.
+#
+# La función de origen se busca recorriendo la pila. Con AsyncSession la sentencia corre en un
+# greenlet de SQLAlchemy cuya pila termina en greenlet_spawn: el recorrido sigue por el greenlet
+# padre, suspendido en el await de la función de app/crud/ que la lanzó.
+
+logger = logging.getLogger(__name__)
+
+_LARGO_PARAMETROS = 500
+# Ayudantes compartidos: se informa la función de app/crud/ que los llamó
+_MODULOS_AUXILIARES = ("app.crud.paginacion",)
+
+
+class ConsultaLenta:
+    """Acumulado por sentencia (el texto SQL con placeholders identifica la consulta)"""
+
+    __slots__ = ("sql", "funcion", "veces", "total", "maximo", "ultima", "parametros", "plan")
+
+    def __init__(self, sql: str, funcion: str):
+        self.sql = sql
+        self.funcion = funcion
+        self.veces = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.ultima: Optional[datetime] = None
+        self.parametros = ""
+        self.plan: Optional[str] = None
+
+    @property
+    def promedio(self) -> float:
+        return self.total / self.veces if self.veces else 0.0
+
+
+class RegistroConsultasLentas:
+    """Almacén acotado: `maximo` sentencias distintas y `maximo` ocurrencias recientes"""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self.limpiar()
+
+    def limpiar(self):
+        with self._lock:
+            self._consultas: Dict[str, ConsultaLenta] = {}
+            self._recientes = deque(maxlen=self.maximo)
+
+    def registrar(self, sql: str, funcion: str, segundos: float, parametros: str) -> bool:
+        """Suma la ocurrencia; devuelve True si la sentencia todavía no tiene plan"""
+        with self._lock:
+            consulta = self._consultas.get(sql)
+            if consulta is None:
+                if len(self._consultas) >= self.maximo:
+                    # Se descarta la de menor tiempo total para hacer lugar
+                    menor = min(self._consultas.values(), key=lambda c: c.total)
+                    del self._consultas[menor.sql]
+                consulta = self._consultas[sql] = ConsultaLenta(sql, funcion)
+            consulta.veces += 1
+            consulta.total += segundos
+            consulta.maximo = max(consulta.maximo, segundos)
+            consulta.ultima = datetime.now()
+            consulta.parametros = parametros
+            self._recientes.append((consulta.ultima, funcion, segundos, sql))
+            return consulta.plan is None
+
+    def guardar_plan(self, sql: str, plan: str):
+        with self._lock:
+            consulta = self._consultas.get(sql)
+            if consulta is not None:
+                consulta.plan = plan
+
+    def top(self, limite: int = 50) -> List[ConsultaLenta]:
+        """Las sentencias con más tiempo total acumulado"""
+        with self._lock:
+            return sorted(self._consultas.values(), key=lambda c: c.total, reverse=True)[:limite]
+
+    def recientes(self, limite: int = 50) -> list:
+        with self._lock:
+            return list(reversed(self._recientes))[:limite]
+
+
+registro = RegistroConsultasLentas(settings.consultas_lentas_max)
+
+
+def _marcos(frame) -> Iterator:
+    """Marcos desde `frame` hacia atrás, continuando en los greenlets padres (AsyncSession)"""
+    actual = getcurrent()
+    while True:
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        actual = actual.parent
+        if actual is None:
+            return
+        frame = actual.gr_frame
+
+
+def _funcion_origen() -> str:
+    """Primer marco de la pila que pertenece a app.crud (o a app.api si la consulta es directa)"""
+    respaldo = None
+    for frame in _marcos(sys._getframe(2)):
+        modulo = frame.f_globals.get("__name__", "")
+        if modulo.startswith("app.crud.") and modulo not in _MODULOS_AUXILIARES:
+            return f"{modulo}.{frame.f_code.co_name}:{frame.f_lineno}"
+        if respaldo is None and modulo.startswith("app.") and not modulo.startswith(("app.consultas_lentas", "app.metricas")):
+            respaldo = f"{modulo}.{frame.f_code.co_name}:{frame.f_lineno}"
+    return respaldo or "desconocida"
+
+
+def _explicar(conn, statement: str, parameters) -> str:
+    """Plan de la sentencia en un cursor aparte, dentro de un SAVEPOINT en PostgreSQL
+    para que un error del EXPLAIN no aborte la transacción de la petición"""
+    postgres = conn.dialect.name == "postgresql"
+    prefijo = "EXPLAIN (ANALYZE, BUFFERS) " if postgres else "EXPLAIN QUERY PLAN "
+    cursor = conn.connection.cursor()
+    try:
+        if postgres:
+            cursor.execute("SAVEPOINT consulta_lenta")
+        try:
+            cursor.execute(prefijo + statement, parameters)
+            filas = cursor.fetchall()
+        except Exception:
+            if postgres:
+                cursor.execute("ROLLBACK TO SAVEPOINT consulta_lenta")
+            raise
+        if postgres:
+            cursor.execute("RELEASE SAVEPOINT consulta_lenta")
+        # PostgreSQL devuelve una línea por fila; SQLite (id, padre, notused, detalle)
+        return "\n".join(str(fila[0] if postgres else fila[-1]) for fila in filas)
+    finally:
+        cursor.close()
+
+
+# Inicio de cada sentencia en curso por cursor, en el info de la conexión del pool
+_CLAVE_INICIOS = "consultas_lentas_inicio"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if settings.consultas_lentas_umbral_ms > 0:
+        conn.info.setdefault(_CLAVE_INICIOS, {})[id(cursor)] = time.perf_counter()
+
+
+@event.listens_for(Engine, "handle_error")
+def _al_fallar(contexto):
+    # after_cursor_execute no corre si la sentencia falla: sin esto el inicio queda en la conexión
+    # (ExceptionContext.cursor no se asigna en SQLAlchemy 2.0: el cursor está en el execution_context)
+    ejecucion = contexto.execution_context
+    if contexto.connection is not None and ejecucion is not None:
+        contexto.connection.info.get(_CLAVE_INICIOS, {}).pop(id(ejecucion.cursor), None)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.get(_CLAVE_INICIOS, {}).pop(id(cursor), None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    if segundos * 1000 < settings.consultas_lentas_umbral_ms:
+        return
+
+    funcion = _funcion_origen()
+    texto_parametros = repr(parameters)
+    if len(texto_parametros) > _LARGO_PARAMETROS:
+        texto_parametros = texto_parametros[:_LARGO_PARAMETROS] + "..."
+    logger.warning("Consulta lenta (%.1f ms) en %s: %s -- %s",
+                   segundos * 1000, funcion, " ".join(statement.split()), texto_parametros)
+
+    sin_plan = registro.registrar(statement, funcion, segundos, texto_parametros)
+    # Solo SELECT: EXPLAIN ANALYZE ejecuta la sentencia (un WITH puede modificar datos)
+    es_lectura = statement.lstrip().upper().startswith("SELECT")
+    if sin_plan and es_lectura and not executemany and settings.consultas_lentas_explain:
+        try:
+            registro.guardar_plan(statement, _explicar(conn, statement, parameters))
+        except Exception as e:
+            registro.guardar_plan(statement, f"No se pudo obtener el plan: {e}")
@@ -1,22 +1,29 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import List, Optional
 from app.models.personas_mayores import Actividad
+from app.crud.estadisticas import invalidate_estadisticas
 from app.schemas.actividades import ActividadCreate, ActividadUpdate
+from app.crud.paginacion import Orden, paginar, paginar_async
+
+ORDEN_ACTIVIDADES = (Orden(Actividad.act_fecha, descendente=True), Orden(Actividad.id, descendente=True))
+
+
+def _filtro_busqueda(search: str):
+    search_term = f"%{search}%"
+    return Actividad.act_actividad.ilike(search_term)
 
 
 def get_actividad(db: Session, actividad_id: int):
     return db.query(Actividad).filter(Actividad.id == actividad_id).first()
 
 
-def get_actividades(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_actividades(db: Session, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
     query = db.query(Actividad)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            Actividad.act_actividad.ilike(search_term)
-        )
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(_filtro_busqueda(search))
+    return paginar(query, ORDEN_ACTIVIDADES, limit, cursor, skip, con_total)
 
 
 def create_actividad(db: Session, actividad: ActividadCreate):
@@ -24,6 +31,7 @@ def create_actividad(db: Session, actividad: ActividadCreate):
     db.add(db_actividad)
     db.commit()
     db.refresh(db_actividad)
+    invalidate_estadisticas()
     return db_actividad
 
 
@@ -35,6 +43,7 @@ def update_actividad(db: Session, actividad_id: int, actividad_update: Actividad
             setattr(db_actividad, field, value)
         db.commit()
         db.refresh(db_actividad)
+        invalidate_estadisticas()
     return db_actividad
 
 
@@ -43,14 +52,63 @@ def delete_actividad(db: Session, actividad_id: int):
     if db_actividad:
         db.delete(db_actividad)
         db.commit()
+        invalidate_estadisticas()
     return db_actividad
 
 
 def count_actividades(db: Session, search: str = None):
     query = db.query(Actividad)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            Actividad.act_actividad.ilike(search_term)
-        )
+        query = query.filter(_filtro_busqueda(search))
     return query.count()
+
+
+# Variantes asíncronas (AsyncSession)
+
+async def get_actividad_async(db: AsyncSession, actividad_id: int):
+    return await db.get(Actividad, actividad_id)
+
+
+async def get_actividades_async(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
+    stmt = select(Actividad)
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await paginar_async(db, stmt, ORDEN_ACTIVIDADES, limit, cursor, skip, con_total)
+
+
+async def count_actividades_async(db: AsyncSession, search: str = None):
+    stmt = select(func.count(Actividad.id))
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await db.scalar(stmt)
+
+
+async def create_actividad_async(db: AsyncSession, actividad: ActividadCreate):
+    db_actividad = Actividad(**actividad.dict())
+    db.add(db_actividad)
+    await db.commit()
+    await db.refresh(db_actividad)
+    invalidate_estadisticas()
+    return db_actividad
+
+
+async def update_actividad_async(db: AsyncSession, actividad_id: int, actividad_update: ActividadUpdate):
+    db_actividad = await db.get(Actividad, actividad_id)
+    if db_actividad:
+        update_data = actividad_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_actividad, field, value)
+        await db.commit()
+        await db.refresh(db_actividad)
+        invalidate_estadisticas()
+    return db_actividad
+
+
+async def delete_actividad_async(db: AsyncSession, actividad_id: int):
+    # Las relaciones se cargan antes para que el flush no dispare un lazy load
+    db_actividad = await db.get(Actividad, actividad_id, options=[selectinload(Actividad.personas)])
+    if db_actividad:
+        await db.delete(db_actividad)
+        await db.commit()
+        invalidate_estadisticas()
+    return db_actividad
@@ -0,0 +1,107 @@
+from typing import List, NamedTuple, Optional, Sequence
+from sqlalchemy import Date, cast, delete, exists, insert, literal, null, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.personas_mayores import (
+    PersonaMayor, Actividad, Talleres, Viaje,
+    ActividadAsistencia, TallerAsistencia, ViajeAsistencia)
+
+# Asistencia a actividades, talleres y viajes. La inscripción de una lista completa es un
+# solo INSERT ... SELECT ... ON CONFLICT DO NOTHING: el SELECT descarta personas o eventos
+# inexistentes y el ON CONFLICT las ya inscritas, así que no hace falta consultar antes.
+
+
+class TipoEvento(NamedTuple):
+    evento: type
+    asistencia: type
+    persona_col: object
+    evento_col: object
+    nombre: object
+    fecha: Optional[object]
+
+
+EVENTOS = {
+    "actividades": TipoEvento(
+        Actividad, ActividadAsistencia, ActividadAsistencia.actasist_perid,
+        ActividadAsistencia.actasist_actid, Actividad.act_actividad, Actividad.act_fecha),
+    "talleres": TipoEvento(
+        Talleres, TallerAsistencia, TallerAsistencia.talasist_perid,
+        TallerAsistencia.talasist_talid, Talleres.tal_taller, None),
+    "viajes": TipoEvento(
+        Viaje, ViajeAsistencia, ViajeAsistencia.viaasist_perid,
+        ViajeAsistencia.viaasist_viaid, Viaje.via_viaje, Viaje.via_fecha),
+}
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def evento_existe(db: Session, tipo: str, evento_id: int) -> bool:
+    modelo = EVENTOS[tipo].evento
+    return db.scalar(select(exists().where(modelo.id == evento_id)))
+
+
+def registrar_asistencias(db: Session, tipo: str, evento_id: int, persona_ids: Sequence[int]) -> List[int]:
+    """Inscribe a las personas en el evento y devuelve los id efectivamente agregados
+    (se omiten los ya inscritos y los que no existen). Una sentencia y un commit."""
+    t = EVENTOS[tipo]
+    persona_ids = sorted(set(persona_ids))
+    candidatos = select(PersonaMayor.id, t.evento.id).join(
+        t.evento, t.evento.id == evento_id
+    ).where(PersonaMayor.id.in_(persona_ids))
+
+    insert_dialecto = _INSERTS.get(db.get_bind().dialect.name)
+    if insert_dialecto is not None:
+        stmt = insert_dialecto(t.asistencia).from_select(
+            [t.persona_col.key, t.evento_col.key], candidatos
+        ).on_conflict_do_nothing().returning(t.persona_col)
+        registradas = list(db.scalars(stmt))
+    else:
+        # Otros motores: se excluyen los ya inscritos en el mismo SELECT
+        candidatos = candidatos.where(~exists().where(
+            t.persona_col == PersonaMayor.id, t.evento_col == evento_id))
+        registradas = list(db.scalars(candidatos))
+        if registradas:
+            db.execute(insert(t.asistencia), [
+                {t.persona_col.key: persona_id, t.evento_col.key: evento_id} for persona_id in registradas
+            ])
+    db.commit()
+    return sorted(registradas)
+
+
+def eliminar_asistencia(db: Session, tipo: str, evento_id: int, persona_id: int) -> bool:
+    t = EVENTOS[tipo]
+    resultado = db.execute(delete(t.asistencia).where(t.persona_col == persona_id, t.evento_col == evento_id))
+    db.commit()
+    return resultado.rowcount > 0
+
+
+def get_asistentes(db: Session, tipo: str, evento_id: int):
+    """Personas inscritas en el evento, por apellido y nombre"""
+    t = EVENTOS[tipo]
+    return db.execute(
+        select(PersonaMayor.id, PersonaMayor.per_rut, PersonaMayor.per_nombre, PersonaMayor.per_apellido)
+        .join(t.asistencia, t.persona_col == PersonaMayor.id)
+        .where(t.evento_col == evento_id)
+        .order_by(PersonaMayor.per_apellido, PersonaMayor.per_nombre, PersonaMayor.id)
+    ).all()
+
+
+def get_asistencias_persona(db: Session, persona_id: int):
+    """Actividades, talleres y viajes de la persona en una sola consulta (UNION ALL),
+    los más recientes primero; los talleres no tienen fecha y quedan al final"""
+    partes = [
+        select(
+            literal(tipo).label("tipo"),
+            t.evento.id.label("id"),
+            t.nombre.label("nombre"),
+            (t.fecha if t.fecha is not None else cast(null(), Date)).label("fecha"),
+        )
+        .join(t.asistencia, t.evento_col == t.evento.id)
+        .where(t.persona_col == persona_id)
+        for tipo, t in EVENTOS.items()
+    ]
+    consulta = union_all(*partes).subquery()
+    return db.execute(
+        select(consulta).order_by(
+            consulta.c.fecha.desc().nulls_last(), consulta.c.tipo, consulta.c.nombre, consulta.c.id)
+    ).all()
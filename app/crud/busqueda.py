@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, literal_column, text
+from ..models.personas_mayores import PersonaMayor
+
+# En PostgreSQL las expresiones coinciden con los índices GIN (pg_trgm) creados en la
+# migración 3b9f2c4d8e17; en otros motores se usa el mismo LIKE sin unaccent.
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas y sin tildes, para comparar nombres en español"""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+def normalizar_rut(rut: str) -> str:
+    """RUT sin puntos, guion ni espacios: '12.345.678-k' -> '12345678K'"""
+    return re.sub(r"[^0-9kK]", "", rut).upper()
+
+def formatear_rut(rut: str) -> str:
+    """Forma canónica para guardar: '12.345.678-k' -> '12345678-K'"""
+    normalizado = normalizar_rut(rut)
+    return f"{normalizado[:-1]}-{normalizado[-1:]}"
+
+def es_rut(texto: str) -> bool:
+    return bool(re.fullmatch(r"[\d.\s]+-?\s*[\dkK]?", texto.strip())) and any(c.isdigit() for c in texto)
+
+_f_unaccent_disponible = None
+
+def _es_postgres(db: Session) -> bool:
+    """PostgreSQL con la migración de búsqueda aplicada (se verifica una vez por proceso)"""
+    global _f_unaccent_disponible
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    if _f_unaccent_disponible is None:
+        _f_unaccent_disponible = db.execute(
+            text("SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL")
+        ).scalar()
+    return _f_unaccent_disponible
+
+def _patron(termino: str) -> str:
+    escapado = termino.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+def texto_expr(db: Session, columna):
+    if _es_postgres(db):
+        return func.lower(func.f_unaccent(columna))
+    return func.lower(columna)
+
+def rut_expr():
+    return func.upper(func.replace(func.replace(
+        PersonaMayor.per_rut, literal_column("'.'"), literal_column("''")),
+        literal_column("'-'"), literal_column("''")))
+
+def filtro_texto(db: Session, columna, termino: str):
+    """LIKE '%término%' sin distinguir mayúsculas ni tildes"""
+    return texto_expr(db, columna).like(_patron(normalizar_texto(termino)), escape="\\")
+
+def filtro_rut(termino: str):
+    return rut_expr().like(_patron(normalizar_rut(termino)), escape="\\")
+
+def filtro_personas(db: Session, search: str):
+    """Cada palabra del término debe aparecer en el nombre, el apellido o el RUT"""
+    if es_rut(search):
+        return filtro_rut(search)
+    condiciones = []
+    for palabra in normalizar_texto(search).split():
+        condicion = [
+            filtro_texto(db, PersonaMayor.per_nombre, palabra),
+            filtro_texto(db, PersonaMayor.per_apellido, palabra),
+        ]
+        if es_rut(palabra):
+            condicion.append(filtro_rut(palabra))
+        condiciones.append(or_(*condicion))
+    return and_(*condiciones)
+
+def ranking_personas(db: Session, search: str):
+    """Similitud trigram con el nombre completo (solo PostgreSQL); None en otros motores"""
+    if not _es_postgres(db):
+        return None
+    if es_rut(search):
+        return func.similarity(rut_expr(), normalizar_rut(search))
+    nombre_completo = PersonaMayor.per_nombre + literal_column("' '") + PersonaMayor.per_apellido
+    return func.similarity(texto_expr(db, nombre_completo), normalizar_texto(search))
@@ -1,27 +1,34 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import List, Optional
 from app.models.personas_mayores import Especialidad
 from app.schemas.especialidades import EspecialidadCreate, EspecialidadUpdate
+from app.crud.paginacion import Orden, paginar, paginar_async
+
+ORDEN_ESPECIALIDADES = (Orden(Especialidad.espe_especialidad), Orden(Especialidad.id))
+
+
+def _filtro_busqueda(search: str):
+    search_term = f"%{search}%"
+    return Especialidad.espe_especialidad.ilike(search_term)
 
 
 def get_especialidad(db: Session, especialidad_id: int):
     return db.query(Especialidad).filter(Especialidad.id == especialidad_id).first()
 
 
-def get_especialidades(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_especialidades(db: Session, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
     query = db.query(Especialidad)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(Especialidad.espe_especialidad.ilike(search_term))
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(_filtro_busqueda(search))
+    return paginar(query, ORDEN_ESPECIALIDADES, limit, cursor, skip, con_total)
 
 
 def count_especialidades(db: Session, search: str = None):
     query = db.query(Especialidad)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(Especialidad.espe_especialidad.ilike(search_term))
+        query = query.filter(_filtro_busqueda(search))
     return query.count()
 
 
@@ -49,3 +56,51 @@ def delete_especialidad(db: Session, especialidad_id: int):
         db.delete(db_especialidad)
         db.commit()
     return db_especialidad
+
+
+# Variantes asíncronas (AsyncSession)
+
+async def get_especialidad_async(db: AsyncSession, especialidad_id: int):
+    return await db.get(Especialidad, especialidad_id)
+
+
+async def get_especialidades_async(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
+    stmt = select(Especialidad)
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await paginar_async(db, stmt, ORDEN_ESPECIALIDADES, limit, cursor, skip, con_total)
+
+
+async def count_especialidades_async(db: AsyncSession, search: str = None):
+    stmt = select(func.count(Especialidad.id))
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await db.scalar(stmt)
+
+
+async def create_especialidad_async(db: AsyncSession, especialidad: EspecialidadCreate):
+    db_especialidad = Especialidad(**especialidad.dict())
+    db.add(db_especialidad)
+    await db.commit()
+    await db.refresh(db_especialidad)
+    return db_especialidad
+
+
+async def update_especialidad_async(db: AsyncSession, especialidad_id: int, especialidad_update: EspecialidadUpdate):
+    db_especialidad = await db.get(Especialidad, especialidad_id)
+    if db_especialidad:
+        update_data = especialidad_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_especialidad, field, value)
+        await db.commit()
+        await db.refresh(db_especialidad)
+    return db_especialidad
+
+
+async def delete_especialidad_async(db: AsyncSession, especialidad_id: int):
+    # Las relaciones se cargan antes para que el flush no dispare un lazy load
+    db_especialidad = await db.get(Especialidad, especialidad_id, options=[selectinload(Especialidad.especialistas)])
+    if db_especialidad:
+        await db.delete(db_especialidad)
+        await db.commit()
+    return db_especialidad
@@ -1,41 +1,39 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import List, Optional
 from app.models.personas_mayores import Especialista, Especialidad
 from app.schemas.especialistas import EspecialistaCreate, EspecialistaUpdate
+from app.crud.paginacion import Orden, paginar, paginar_async
+from app.crud import proyecciones, resumenes
+
+ORDEN_ESPECIALISTAS = (Orden(Especialista.esp_apellido), Orden(Especialista.esp_nombre), Orden(Especialista.id))
+
+
+def _filtro_busqueda(search: str):
+    search_term = f"%{search}%"
+    return or_(
+        Especialista.esp_nombre.ilike(search_term),
+        Especialista.esp_apellido.ilike(search_term),
+        Especialista.esp_rut.ilike(search_term)
+    )
 
 
 def get_especialista(db: Session, especialista_id: int):
     return db.query(Especialista).options(joinedload(Especialista.especialidad)).filter(Especialista.id == especialista_id).first()
 
 
-def get_especialistas(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_especialistas(db: Session, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
     query = db.query(Especialista).options(joinedload(Especialista.especialidad))
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Especialista.esp_nombre.ilike(search_term),
-                Especialista.esp_apellido.ilike(search_term),
-                Especialista.esp_rut.ilike(search_term)
-            )
-        )
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(_filtro_busqueda(search))
+    return paginar(query, ORDEN_ESPECIALISTAS, limit, cursor, skip, con_total)
 
 
 def count_especialistas(db: Session, search: str = None):
     query = db.query(Especialista)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Especialista.esp_nombre.ilike(search_term),
-                Especialista.esp_apellido.ilike(search_term),
-                Especialista.esp_rut.ilike(search_term)
-            )
-        )
-
-
+        query = query.filter(_filtro_busqueda(search))
     return query.count()
 
 
@@ -50,7 +48,10 @@ def create_especialista(db: Session, especialista: EspecialistaCreate):
 def update_especialista(db: Session, especialista_id: int, especialista_update: EspecialistaUpdate):
     db_especialista = db.query(Especialista).filter(Especialista.id == especialista_id).first()
     if db_especialista:
-        for key, value in especialista_update.dict(exclude_unset=True).items():
+        cambios = especialista_update.dict(exclude_unset=True)
+        if "esp_espeid" in cambios:
+            resumenes.mover_especialista(db, especialista_id, db_especialista.esp_espeid, cambios["esp_espeid"])
+        for key, value in cambios.items():
             setattr(db_especialista, key, value)
         db.commit()
         db.refresh(db_especialista)
@@ -60,20 +61,63 @@ def update_especialista(db: Session, especialista_id: int, especialista_update:
 def delete_especialista(db: Session, especialista_id: int):
     db_especialista = db.query(Especialista).filter(Especialista.id == especialista_id).first()
     if db_especialista:
+        # Sus atenciones quedan sin especialista: dejan de contar en su especialidad
+        resumenes.mover_especialista(db, especialista_id, db_especialista.esp_espeid, None)
         db.delete(db_especialista)
         db.commit()
     return db_especialista
 
 
-def count_especialistas(db: Session, search: str = None):
-    query = db.query(Especialista)
+# Variantes asíncronas (AsyncSession)
+
+async def get_especialista_async(db: AsyncSession, especialista_id: int):
+    return await db.get(Especialista, especialista_id, options=[joinedload(Especialista.especialidad)])
+
+
+async def get_especialistas_async(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
+    """Página de FilaEspecialista para el listado"""
+    stmt = proyecciones.unir_especialista(select(*proyecciones.COLUMNAS_ESPECIALISTA))
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Especialista.esp_nombre.ilike(search_term),
-                Especialista.esp_apellido.ilike(search_term),
-                Especialista.esp_especialidad.ilike(search_term)
-            )
-        )
-    return query.count()
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await paginar_async(db, stmt, ORDEN_ESPECIALISTAS, limit, cursor, skip, con_total,
+                               proyeccion=proyecciones.FilaEspecialista)
+
+
+async def count_especialistas_async(db: AsyncSession, search: str = None):
+    stmt = select(func.count(Especialista.id))
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await db.scalar(stmt)
+
+
+async def create_especialista_async(db: AsyncSession, especialista: EspecialistaCreate):
+    db_especialista = Especialista(**especialista.dict())
+    db.add(db_especialista)
+    await db.commit()
+    await db.refresh(db_especialista)
+    return db_especialista
+
+
+async def update_especialista_async(db: AsyncSession, especialista_id: int, especialista_update: EspecialistaUpdate):
+    db_especialista = await db.get(Especialista, especialista_id)
+    if db_especialista:
+        cambios = especialista_update.dict(exclude_unset=True)
+        if "esp_espeid" in cambios:
+            anterior = db_especialista.esp_espeid
+            await db.run_sync(lambda s: resumenes.mover_especialista(s, especialista_id, anterior, cambios["esp_espeid"]))
+        for key, value in cambios.items():
+            setattr(db_especialista, key, value)
+        await db.commit()
+        await db.refresh(db_especialista)
+    return db_especialista
+
+
+async def delete_especialista_async(db: AsyncSession, especialista_id: int):
+    # Las atenciones se cargan antes para que el flush no dispare un lazy load
+    db_especialista = await db.get(Especialista, especialista_id, options=[selectinload(Especialista.atenciones)])
+    if db_especialista:
+        anterior = db_especialista.esp_espeid
+        await db.run_sync(lambda s: resumenes.mover_especialista(s, especialista_id, anterior, None))
+        await db.delete(db_especialista)
+        await db.commit()
+    return db_especialista
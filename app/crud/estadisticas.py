@@ -0,0 +1,81 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import String, func, literal, or_, select, union_all, desc
+from datetime import date, timedelta
+from ..models.personas_mayores import (
+    PersonaMayor, Genero, Macrosector, Atencion, Actividad, Viaje)
+from ..cache import TTLCache
+from ..config import settings
+
+# Resumen del dashboard; las funciones de escritura de app/crud/* lo invalidan
+_cache = TTLCache(ttl=settings.estadisticas_cache_ttl)
+
+def invalidate_estadisticas():
+    _cache.invalidate()
+
+def _estadisticas_stmt(dias_sin_atencion: int):
+    fecha_limite = date.today() - timedelta(days=dias_sin_atencion)
+    sin_atencion_reciente = or_(
+        PersonaMayor.per_ultima_atencion.is_(None),
+        PersonaMayor.per_ultima_atencion < fecha_limite
+    )
+
+    def total(nombre, stmt):
+        return stmt.add_columns(literal("total", String), literal(nombre, String))
+
+    # Cada fila es (cantidad, tipo, clave): totales, desglose por género y por macrosector
+    return union_all(
+        total("total_personas", select(func.count(PersonaMayor.id))),
+        total("total_atenciones", select(func.count(Atencion.id))),
+        total("total_actividades", select(func.count(Actividad.id))),
+        total("total_viajes", select(func.count(Viaje.id))),
+        total("personas_sin_atencion", select(func.count(PersonaMayor.id)).where(sin_atencion_reciente)),
+        select(func.count(PersonaMayor.id), literal("genero", String), Genero.genero)
+            .select_from(Genero).outerjoin(PersonaMayor).group_by(Genero.genero),
+        select(func.count(PersonaMayor.id), literal("macrosector", String), Macrosector.macrosector)
+            .select_from(Macrosector).outerjoin(PersonaMayor).group_by(Macrosector.macrosector),
+    )
+
+def get_estadisticas_generales(db: Session, dias_sin_atencion: int = 90):
+    """Todos los contadores del sistema en una sola consulta, servidos desde cache"""
+    key = ("estadisticas", dias_sin_atencion)
+    estadisticas = _cache.get(key)
+    if estadisticas is not None:
+        return estadisticas
+
+    estadisticas = {
+        "total_personas": 0,
+        "total_atenciones": 0,
+        "total_actividades": 0,
+        "total_viajes": 0,
+        "personas_sin_atencion": 0,
+        "personas_por_genero": {},
+        "personas_por_macrosector": {}
+    }
+    for cantidad, tipo, clave in db.execute(_estadisticas_stmt(dias_sin_atencion)):
+        if tipo == "total":
+            estadisticas[clave] = cantidad
+        else:
+            estadisticas[f"personas_por_{tipo}"][clave] = cantidad
+
+    _cache.set(key, estadisticas)
+    return estadisticas
+
+def get_personas_recientes(db: Session, limit: int = 5):
+    """Últimas personas registradas, como filas livianas cacheadas junto a las estadísticas"""
+    key = ("personas_recientes", limit)
+    personas = _cache.get(key)
+    if personas is not None:
+        return personas
+
+    rows = db.execute(
+        select(
+            PersonaMayor.id,
+            PersonaMayor.per_nombre,
+            PersonaMayor.per_apellido,
+            PersonaMayor.per_rut,
+            Macrosector.macrosector
+        ).outerjoin(Macrosector).order_by(desc(PersonaMayor.id)).limit(limit)
+    ).all()
+    personas = tuple(rows)
+    _cache.set(key, personas)
+    return personas
@@ -0,0 +1,193 @@
+from datetime import date
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+from sqlalchemy import JSON, Date, bindparam, cast, func, literal_column, null, select
+from sqlalchemy.orm import Session
+from ..models.personas_mayores import (
+    PersonaMayor, Genero, Nacionalidad, Macrosector, UnidadVecinal,
+    Especialista, Especialidad, Atencion, OrganizacionComunitaria,
+    MembresiaOrganizacion, ResumenAtenciones)
+from .asistencias import EVENTOS, TipoEvento
+
+# Ficha de una persona (página de detalle) en una sola sentencia: los datos de la persona con sus
+# etiquetas por OUTER JOIN, el total de atenciones de res_atenciones_persona y, como subconsultas
+# escalares, las últimas atenciones y la participación en actividades, talleres, viajes y
+# organizaciones (total y más recientes), agregadas en JSON por el motor.
+
+PARTICIPACIONES = {
+    **EVENTOS,
+    "organizaciones": TipoEvento(
+        OrganizacionComunitaria, MembresiaOrganizacion, MembresiaOrganizacion.memorg_perid,
+        MembresiaOrganizacion.memorg_orgid, OrganizacionComunitaria.org_comunitaria, None),
+}
+
+# (objeto, agregado) por motor; en otros se ejecuta una consulta por sección
+_FUNCIONES_JSON = {
+    "postgresql": ("json_build_object", "json_agg"),
+    "sqlite": ("json_object", "json_group_array"),
+}
+
+
+class AtencionFicha(NamedTuple):
+    id: int
+    at_fecha: date
+    especialista: Optional[str]
+    especialidad: Optional[str]
+
+
+class Participacion(NamedTuple):
+    id: int
+    nombre: Optional[str]
+    fecha: Optional[date]
+
+
+class Participaciones(NamedTuple):
+    total: int
+    recientes: List[Participacion]
+
+
+class FichaPersona(NamedTuple):
+    id: int
+    per_rut: str
+    per_nombre: str
+    per_apellido: str
+    per_birthdate: date
+    per_direccion: Optional[str]
+    per_ultima_atencion: Optional[date]
+    genero: Optional[str]
+    nacionalidad: Optional[str]
+    macrosector: Optional[str]
+    unidad_vecinal: Optional[str]
+    total_atenciones: int
+    atenciones: List[AtencionFicha]
+    actividades: Participaciones
+    talleres: Participaciones
+    viajes: Participaciones
+    organizaciones: Participaciones
+
+
+# persona_id es un id o el bindparam de la sentencia cacheada
+def _ultimas_atenciones(persona_id, limite: int):
+    return select(
+        Atencion.id,
+        Atencion.at_fecha,
+        (Especialista.esp_nombre + " " + Especialista.esp_apellido).label("especialista"),
+        Especialidad.espe_especialidad.label("especialidad"),
+    ).outerjoin(
+        Especialista, Atencion.at_espid == Especialista.id
+    ).outerjoin(
+        Especialidad, Especialista.esp_espeid == Especialidad.id
+    ).where(
+        Atencion.at_perid == persona_id
+    ).order_by(Atencion.at_fecha.desc(), Atencion.id.desc()).limit(limite)
+
+
+def _recientes(t: TipoEvento, persona_id, limite: int):
+    # Sin fecha (talleres, organizaciones) las más recientes son las de id mayor
+    orden = (t.fecha.desc(), t.evento.id.desc()) if t.fecha is not None else (t.evento.id.desc(),)
+    return select(
+        t.evento.id,
+        t.nombre.label("nombre"),
+        (t.fecha if t.fecha is not None else cast(null(), Date)).label("fecha"),
+    ).join(t.asistencia, t.evento_col == t.evento.id).where(
+        t.persona_col == persona_id
+    ).order_by(*orden).limit(limite)
+
+
+def _total(t: TipoEvento, persona_id):
+    return select(func.count()).select_from(t.asistencia).where(t.persona_col == persona_id)
+
+
+def _como_json(funciones, consulta):
+    """Subconsulta escalar con las filas de `consulta` como arreglo JSON de objetos"""
+    objeto, agregado = funciones
+    filas = consulta.subquery()
+    campos = []
+    for columna in filas.c:
+        # Las claves van como texto constante en la sentencia, no como parámetros
+        campos += [literal_column(f"'{columna.key}'"), columna]
+    return select(
+        getattr(func, agregado)(getattr(func, objeto)(*campos), type_=JSON)
+    ).select_from(filas).scalar_subquery()
+
+
+def _fecha(valor) -> Optional[date]:
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def _objetos(filas) -> list:
+    """Objetos del arreglo JSON, o las filas de la consulta por sección por nombre de columna"""
+    return [f if isinstance(f, dict) else f._mapping for f in filas or ()]
+
+
+def _atenciones(filas) -> List[AtencionFicha]:
+    # El orden dentro del agregado JSON no está garantizado: se reordena aquí
+    atenciones = [
+        AtencionFicha(f["id"], _fecha(f["at_fecha"]), f["especialista"], f["especialidad"])
+        for f in _objetos(filas)
+    ]
+    return sorted(atenciones, key=lambda a: (a.at_fecha, a.id), reverse=True)
+
+
+def _participaciones(total, filas) -> Participaciones:
+    recientes = [
+        Participacion(f["id"], f["nombre"], _fecha(f["fecha"]))
+        for f in _objetos(filas)
+    ]
+    recientes.sort(key=lambda p: (p.fecha is not None, p.fecha or date.min, p.id), reverse=True)
+    return Participaciones(total or 0, recientes)
+
+
+@lru_cache(maxsize=16)
+def _sentencia_ficha(dialecto: str, atenciones: int, recientes: int):
+    """La sentencia se arma una vez por motor y límites; la persona va en :persona_id"""
+    funciones = _FUNCIONES_JSON.get(dialecto)
+    persona_id = bindparam("persona_id")
+    columnas = [
+        PersonaMayor.id, PersonaMayor.per_rut, PersonaMayor.per_nombre, PersonaMayor.per_apellido,
+        PersonaMayor.per_birthdate, PersonaMayor.per_direccion, PersonaMayor.per_ultima_atencion,
+        Genero.genero, Nacionalidad.nacionalidad, Macrosector.macrosector, UnidadVecinal.unidadvecinal,
+        func.coalesce(ResumenAtenciones.rap_total, 0).label("total_atenciones"),
+    ]
+    if funciones is not None:
+        columnas.append(_como_json(funciones, _ultimas_atenciones(persona_id, atenciones)).label("atenciones"))
+        for nombre, t in PARTICIPACIONES.items():
+            columnas.append(_total(t, persona_id).scalar_subquery().label(f"total_{nombre}"))
+            columnas.append(_como_json(funciones, _recientes(t, persona_id, recientes)).label(nombre))
+
+    return select(*columnas).select_from(PersonaMayor).outerjoin(
+        Genero, PersonaMayor.per_genid == Genero.id
+    ).outerjoin(
+        Nacionalidad, PersonaMayor.per_nacid == Nacionalidad.id
+    ).outerjoin(
+        Macrosector, PersonaMayor.per_macid == Macrosector.id
+    ).outerjoin(
+        UnidadVecinal, PersonaMayor.per_uniid == UnidadVecinal.id
+    ).outerjoin(
+        ResumenAtenciones, ResumenAtenciones.rap_perid == PersonaMayor.id
+    ).where(PersonaMayor.id == persona_id)
+
+
+def get_ficha_persona(db: Session, persona_id: int, atenciones: int = 5, recientes: int = 5) -> Optional[FichaPersona]:
+    """Ficha completa para /personas/{id}: un round-trip en PostgreSQL y SQLite"""
+    dialecto = db.get_bind().dialect.name
+    fila = db.execute(_sentencia_ficha(dialecto, atenciones, recientes), {"persona_id": persona_id}).first()
+    if fila is None:
+        return None
+
+    if dialecto in _FUNCIONES_JSON:
+        lista_atenciones = fila.atenciones
+        secciones = {
+            nombre: _participaciones(getattr(fila, f"total_{nombre}"), getattr(fila, nombre))
+            for nombre in PARTICIPACIONES
+        }
+    else:
+        # Otros motores: una consulta por sección con las mismas sentencias
+        lista_atenciones = db.execute(_ultimas_atenciones(persona_id, atenciones)).all()
+        secciones = {
+            nombre: _participaciones(
+                db.scalar(_total(t, persona_id)), db.execute(_recientes(t, persona_id, recientes)).all())
+            for nombre, t in PARTICIPACIONES.items()
+        }
+
+    return FichaPersona(*fila[:12], _atenciones(lista_atenciones), **secciones)
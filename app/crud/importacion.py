@@ -0,0 +1,197 @@
+import csv
+import io
+import re
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from ..models.personas_mayores import PersonaMayor
+from ..schemas.personas_mayores import PersonaMayorCreate
+from . import referencias
+from .busqueda import formatear_rut, normalizar_rut, normalizar_texto, rut_expr
+from .estadisticas import invalidate_estadisticas
+from .. import versiones
+
+# Carga masiva de personas mayores desde CSV: se lee fila a fila, se valida con
+# PersonaMayorCreate y se inserta por lotes (COPY en PostgreSQL, executemany en otros
+# motores). Todo el archivo se carga en una sola transacción.
+
+# Columna del CSV -> campo de PersonaMayorCreate
+COLUMNAS_IMPORTACION = {
+    "rut": "per_rut",
+    "nombre": "per_nombre",
+    "apellido": "per_apellido",
+    "fecha_nacimiento": "per_birthdate",
+    "direccion": "per_direccion",
+}
+
+# Columna del CSV -> (tabla de referencia, campo con el nombre, campo de PersonaMayorCreate)
+REFERENCIAS_IMPORTACION = {
+    "genero": ("generos", "genero", "per_genid"),
+    "nacionalidad": ("nacionalidades", "nacionalidad", "per_nacid"),
+    "macrosector": ("macrosectores", "macrosector", "per_macid"),
+    "unidad_vecinal": ("unidades_vecinales", "unidadvecinal", "per_uniid"),
+}
+
+_CAMPOS = list(PersonaMayorCreate.model_fields)
+
+
+class FilaRechazada(NamedTuple):
+    linea: int
+    rut: str
+    motivo: str
+
+
+class ResultadoImportacion(NamedTuple):
+    insertadas: int
+    rechazadas: List[FilaRechazada]
+    ruts_duplicados: List[str]
+
+
+def _leer_csv(archivo: IO[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(línea, fila) por cada registro; acepta ',' o ';' como separador (Excel en español usa ';')"""
+    encabezado = archivo.readline()
+    separador = ";" if encabezado.count(";") > encabezado.count(",") else ","
+    columnas = [normalizar_texto(c).replace(" ", "_") for c in next(csv.reader([encabezado], delimiter=separador))]
+    faltantes = [c for c in ("rut", "nombre", "apellido", "fecha_nacimiento") if c not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias en el CSV: {', '.join(faltantes)}")
+    lector = csv.DictReader(archivo, fieldnames=columnas, delimiter=separador)
+    for fila in lector:
+        # DictReader no cuenta el encabezado que ya se leyó
+        yield lector.line_num + 1, fila
+
+
+def _indices_referencias(db: Session) -> Dict[str, Dict[str, int]]:
+    """{columna: {nombre normalizado: id}} a partir del cache de referencias"""
+    indices = {}
+    for columna, (tabla, campo, _) in REFERENCIAS_IMPORTACION.items():
+        indices[columna] = {
+            normalizar_texto(getattr(ref, campo)): ref.id
+            for ref in referencias.get_referencia(db, tabla)
+        }
+    return indices
+
+
+def _parsear_fecha(valor: str):
+    """Acepta AAAA-MM-DD y DD/MM/AAAA (o DD-MM-AAAA)"""
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha inválida: '{valor}'")
+
+
+def _validar(fila: Dict[str, str], indices: Dict[str, Dict[str, int]]) -> dict:
+    datos = {}
+    for columna, campo in COLUMNAS_IMPORTACION.items():
+        valor = (fila.get(columna) or "").strip()
+        datos[campo] = valor or None
+    if datos["per_rut"]:
+        if not re.fullmatch(r"\d+[0-9K]", normalizar_rut(datos["per_rut"])):
+            raise ValueError(f"RUT inválido: '{datos['per_rut']}'")
+        # Los RUT se guardan sin puntos y con guion, sea cual sea el formato del archivo
+        datos["per_rut"] = formatear_rut(datos["per_rut"])
+    if datos["per_birthdate"]:
+        datos["per_birthdate"] = _parsear_fecha(datos["per_birthdate"])
+    for columna, (_, _, campo) in REFERENCIAS_IMPORTACION.items():
+        nombre = (fila.get(columna) or "").strip()
+        if not nombre:
+            continue
+        referencia_id = indices[columna].get(normalizar_texto(nombre))
+        if referencia_id is None:
+            raise ValueError(f"Valor desconocido en la columna {columna}: '{nombre}'")
+        datos[campo] = referencia_id
+    return PersonaMayorCreate(**datos).model_dump()
+
+
+def _motivo(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc'])}: {e['msg'].removeprefix('Value error, ')}"
+            for e in error.errors()
+        )
+    return str(error)
+
+
+def _copiar(db: Session, filas: List[dict]):
+    """COPY ... FROM STDIN con psycopg2; el buffer es un CSV en memoria del tamaño del lote"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for fila in filas:
+        # En CSV de COPY un campo sin comillas vacío es NULL
+        writer.writerow(["" if fila[campo] is None else fila[campo] for campo in _CAMPOS])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {PersonaMayor.__tablename__} ({', '.join(_CAMPOS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    # COPY no pasa por el ORM: la versión de la tabla sube con el commit de la importación
+    versiones.marcar_modificadas(db, PersonaMayor.__tablename__)
+
+
+def _insertar_lote(db: Session, filas: List[dict]):
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+        _copiar(db, filas)
+    else:
+        db.execute(insert(PersonaMayor), filas)
+
+
+def _ruts_existentes(db: Session, ruts: Iterable[str]) -> set:
+    """RUT normalizados (sin puntos ni guion) que ya están en la base, guardados en cualquier formato"""
+    return set(db.scalars(select(rut_expr()).where(rut_expr().in_(list(ruts)))))
+
+
+def importar_personas_csv(db: Session, archivo: IO[str], lote: int = 1000) -> ResultadoImportacion:
+    """Valida e inserta las personas del CSV. Las filas inválidas y los RUT ya registrados
+    (en la base o antes en el mismo archivo) se informan y se omiten; el resto se confirma junto."""
+    indices = _indices_referencias(db)
+    rechazadas: List[FilaRechazada] = []
+    duplicados: List[str] = []
+    vistos = set()
+    insertadas = 0
+    pendientes: Dict[str, dict] = {}
+
+    def vaciar():
+        nonlocal insertadas
+        existentes = _ruts_existentes(db, pendientes)
+        duplicados.extend(datos["per_rut"] for rut, datos in pendientes.items() if rut in existentes)
+        filas = [datos for rut, datos in pendientes.items() if rut not in existentes]
+        if filas:
+            _insertar_lote(db, filas)
+            insertadas += len(filas)
+        pendientes.clear()
+
+    try:
+        for linea, fila in _leer_csv(archivo):
+            try:
+                datos = _validar(fila, indices)
+            except (ValueError, ValidationError) as e:
+                rechazadas.append(FilaRechazada(linea, (fila.get("rut") or "").strip(), _motivo(e)))
+                continue
+            # Los duplicados se buscan por RUT normalizado: 11.111.111-1 y 11111111-1 son la misma persona
+            rut = normalizar_rut(datos["per_rut"])
+            if rut in vistos:
+                duplicados.append(datos["per_rut"])
+                continue
+            vistos.add(rut)
+            pendientes[rut] = datos
+            if len(pendientes) >= lote:
+                vaciar()
+        if pendientes:
+            vaciar()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if insertadas:
+        invalidate_estadisticas()
+    return ResultadoImportacion(insertadas, rechazadas, duplicados)
@@ -1,20 +1,28 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import List, Optional
 from app.models.personas_mayores import OrganizacionComunitaria
 from app.schemas.organizaciones import OrganizacionCreate, OrganizacionUpdate
+from app.crud.paginacion import Orden, paginar, paginar_async
+
+ORDEN_ORGANIZACIONES = (Orden(OrganizacionComunitaria.id),)
+
+
+def _filtro_busqueda(search: str):
+    search_term = f"%{search}%"
+    return OrganizacionComunitaria.org_comunitaria.ilike(search_term)
 
 
 def get_organizacion(db: Session, organizacion_id: int):
     return db.query(OrganizacionComunitaria).filter(OrganizacionComunitaria.id == organizacion_id).first()
 
 
-def get_organizaciones(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_organizaciones(db: Session, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
     query = db.query(OrganizacionComunitaria)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(OrganizacionComunitaria.org_comunitaria.ilike(search_term))
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(_filtro_busqueda(search))
+    return paginar(query, ORDEN_ORGANIZACIONES, limit, cursor, skip, con_total)
 
 
 def create_organizacion(db: Session, organizacion: OrganizacionCreate):
@@ -47,6 +55,53 @@ def delete_organizacion(db: Session, organizacion_id: int):
 def count_organizaciones(db: Session, search: str = None):
     query = db.query(OrganizacionComunitaria)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(OrganizacionComunitaria.org_comunitaria.ilike(search_term))
+        query = query.filter(_filtro_busqueda(search))
     return query.count()
+
+
+# Variantes asíncronas (AsyncSession)
+
+async def get_organizacion_async(db: AsyncSession, organizacion_id: int):
+    return await db.get(OrganizacionComunitaria, organizacion_id)
+
+
+async def get_organizaciones_async(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
+    stmt = select(OrganizacionComunitaria)
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await paginar_async(db, stmt, ORDEN_ORGANIZACIONES, limit, cursor, skip, con_total)
+
+
+async def count_organizaciones_async(db: AsyncSession, search: str = None):
+    stmt = select(func.count(OrganizacionComunitaria.id))
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await db.scalar(stmt)
+
+
+async def create_organizacion_async(db: AsyncSession, organizacion: OrganizacionCreate):
+    db_organizacion = OrganizacionComunitaria(**organizacion.dict())
+    db.add(db_organizacion)
+    await db.commit()
+    await db.refresh(db_organizacion)
+    return db_organizacion
+
+
+async def update_organizacion_async(db: AsyncSession, organizacion_id: int, organizacion_update: OrganizacionUpdate):
+    db_organizacion = await db.get(OrganizacionComunitaria, organizacion_id)
+    if db_organizacion:
+        update_data = organizacion_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_organizacion, field, value)
+        await db.commit()
+        await db.refresh(db_organizacion)
+    return db_organizacion
+
+
+async def delete_organizacion_async(db: AsyncSession, organizacion_id: int):
+    # Las relaciones se cargan antes para que el flush no dispare un lazy load
+    db_organizacion = await db.get(OrganizacionComunitaria, organizacion_id, options=[selectinload(OrganizacionComunitaria.personas)])
+    if db_organizacion:
+        await db.delete(db_organizacion)
+        await db.commit()
+    return db_organizacion
@@ -0,0 +1,195 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, NamedTuple, Optional, Sequence
+from sqlalchemy import and_, func, literal, or_, tuple_
+
+# Paginación por cursor (keyset): cada página continúa después de la última fila vista según
+# (columnas de orden..., id), así la página 500 cuesta lo mismo que la primera.
+# El total se pide en la misma consulta con COUNT(*) OVER() y viaja en los cursores de clave,
+# de modo que una página con total es un solo round-trip y las siguientes no vuelven a contar.
+
+
+class Orden(NamedTuple):
+    columna: Any
+    descendente: bool = False
+
+
+class Pagina(list):
+    """Lista de resultados con los cursores opacos de la página siguiente y anterior.
+
+    `total` es el número de filas que cumplen los filtros (None si no se pidió).
+    """
+
+    def __init__(self, items=(), siguiente: Optional[str] = None, anterior: Optional[str] = None, total: Optional[int] = None):
+        super().__init__(items)
+        self.siguiente = siguiente
+        self.anterior = anterior
+        self.total = total
+
+
+class _Estado(NamedTuple):
+    limit: int
+    valores: Optional[list] = None
+    hacia_atras: bool = False
+    offset: int = 0
+    con_total: bool = False
+    total: Optional[int] = None
+
+
+def _json_default(valor):
+    if isinstance(valor, datetime):
+        return {"$dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$d": valor.isoformat()}
+    raise TypeError(f"Valor no serializable en cursor: {valor!r}")
+
+
+def _json_hook(obj):
+    if "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    if "$d" in obj:
+        return date.fromisoformat(obj["$d"])
+    return obj
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, default=_json_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """Decodifica un cursor; un token inválido equivale a no tener cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw, object_hook=_json_hook)
+        return data if isinstance(data, dict) else {}
+    except (ValueError, TypeError):
+        return {}
+
+
+def _despues_de(orden: Sequence[Orden], valores: list, hacia_atras: bool):
+    """Predicado 'fila posterior al cursor' según el orden (o anterior, si se retrocede)"""
+    direcciones = {o.descendente != hacia_atras for o in orden}
+    if len(direcciones) == 1:
+        columnas = tuple_(*[o.columna for o in orden])
+        cursor = tuple_(*[literal(valor, o.columna.type) for o, valor in zip(orden, valores)])
+        return columnas < cursor if direcciones.pop() else columnas > cursor
+    condiciones = []
+    for i, (o, valor) in enumerate(zip(orden, valores)):
+        descendente = o.descendente != hacia_atras
+        siguiente = o.columna < valor if descendente else o.columna > valor
+        iguales = [orden[j].columna == valores[j] for j in range(i)]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+def _con_conteo(query):
+    # La ventana se evalúa antes de OFFSET/LIMIT: cada fila trae el total de la consulta filtrada
+    return query.add_columns(func.count().over().label("total"))
+
+
+def preparar(query, orden: Optional[Sequence[Orden]], limit: int, cursor: Optional[str] = None, skip: int = 0, con_total: bool = False):
+    """Aplica orden, cursor y límite a un Query o Select.
+
+    Con `orden=None` (p. ej. resultados ordenados por relevancia) los cursores guardan un offset.
+    Con `con_total` se agrega COUNT(*) OVER() salvo que el cursor ya traiga el total.
+    Devuelve la consulta y el estado que necesita `armar_pagina`.
+    """
+    data = decode_cursor(cursor) if cursor else {}
+    if orden is None:
+        offset = data.get("o", skip)
+        if con_total:
+            query = _con_conteo(query)
+        return query.offset(offset).limit(limit + 1), _Estado(limit, offset=offset, con_total=con_total)
+
+    valores = data.get("k")
+    hacia_atras = bool(data.get("a"))
+    total = data.get("t")
+    # Tras el predicado de clave la ventana contaría solo lo que queda, por eso el total viaja en el cursor
+    if valores is not None and len(valores) == len(orden) and (total is not None or not con_total):
+        query = query.where(_despues_de(orden, valores, hacia_atras))
+        skip = 0
+    else:
+        valores, hacia_atras, total = None, False, None
+        if con_total:
+            query = _con_conteo(query)
+    columnas = [
+        (o.columna.asc() if o.descendente == hacia_atras else o.columna.desc()) for o in orden
+    ]
+    query = query.order_by(*columnas)
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1), _Estado(limit, valores, hacia_atras, skip, con_total, total)
+
+
+def _valores(item, orden: Sequence[Orden]) -> list:
+    return [getattr(item, o.columna.key) for o in orden]
+
+
+def _separar_total(filas: list, estado: _Estado, proyeccion=None):
+    """Quita la columna de conteo de las filas; devuelve (entidades, total).
+
+    Con `proyeccion` (una NamedTuple de app/crud/proyecciones.py) las filas son columnas sueltas
+    y cada una se convierte en esa tupla.
+    """
+    contadas = estado.con_total and estado.total is None
+    total = estado.total
+    if contadas:
+        total = filas[0].total if filas else (0 if not estado.offset else None)
+    if proyeccion is not None:
+        return [proyeccion._make(fila[:-1] if contadas else fila) for fila in filas], total
+    return ([fila[0] for fila in filas] if contadas else list(filas)), total
+
+
+def armar_pagina(filas: list, orden: Optional[Sequence[Orden]], estado: _Estado, proyeccion=None) -> Pagina:
+    items, total = _separar_total(filas, estado, proyeccion)
+    hay_mas = len(items) > estado.limit
+    items = items[:estado.limit]
+
+    if orden is None:
+        siguiente = encode_cursor({"o": estado.offset + estado.limit}) if hay_mas else None
+        anterior = encode_cursor({"o": max(estado.offset - estado.limit, 0)}) if estado.offset else None
+        return Pagina(items, siguiente, anterior, total)
+
+    if estado.hacia_atras:
+        items.reverse()
+        hay_siguiente, hay_anterior = True, hay_mas
+    else:
+        hay_siguiente, hay_anterior = hay_mas, estado.valores is not None or estado.offset > 0
+
+    extra = {"t": total} if total is not None else {}
+    siguiente = anterior = None
+    if items and hay_siguiente:
+        siguiente = encode_cursor({"k": _valores(items[-1], orden), **extra})
+    if items and hay_anterior:
+        anterior = encode_cursor({"k": _valores(items[0], orden), "a": 1, **extra})
+    return Pagina(items, siguiente, anterior, total)
+
+
+def _sin_offset(query, limit: int):
+    return query.offset(None).limit(limit)
+
+
+def paginar(query, orden: Optional[Sequence[Orden]], limit: int, cursor: Optional[str] = None, skip: int = 0, con_total: bool = False, proyeccion=None) -> Pagina:
+    """Versión síncrona: prepara, ejecuta el Query y arma la página"""
+    query, estado = preparar(query, orden, limit, cursor, skip, con_total)
+    pagina = armar_pagina(query.all(), orden, estado, proyeccion)
+    if con_total and pagina.total is None:
+        # Offset fuera de rango: no volvió ninguna fila que traiga el conteo
+        fila = _sin_offset(query, 1).first()
+        pagina.total = fila.total if fila else 0
+    return pagina
+
+
+async def paginar_async(db, stmt, orden: Optional[Sequence[Orden]], limit: int, cursor: Optional[str] = None, skip: int = 0, con_total: bool = False, proyeccion=None) -> Pagina:
+    """Versión para AsyncSession sobre un Select de entidades (o de columnas, con `proyeccion`)"""
+    stmt, estado = preparar(stmt, orden, limit, cursor, skip, con_total)
+    result = await db.execute(stmt)
+    columnas = proyeccion is not None or (estado.con_total and estado.total is None)
+    filas = result.all() if columnas else result.scalars().all()
+    pagina = armar_pagina(filas, orden, estado, proyeccion)
+    if con_total and pagina.total is None:
+        fila = (await db.execute(_sin_offset(stmt, 1))).first()
+        pagina.total = fila.total if fila else 0
+    return pagina
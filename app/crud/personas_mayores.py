@@ -1,14 +1,19 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
-from datetime import date, datetime
+from sqlalchemy import func, desc, or_, select, update
+from datetime import date, timedelta
 from typing import List, Optional
 from ..models.personas_mayores import (
-    PersonaMayor, Macrosector, UnidadVecinal, Genero,
-    Nacionalidad, Especialista, Especialidad, Atencion,
+    PersonaMayor, Especialista, Especialidad, Atencion,
     Actividad, Viaje, Talleres)
 from ..schemas.personas_mayores import (
     PersonaMayorCreate, PersonaMayorUpdate, EspecialistaCreate,
     EspecialistaUpdate, AtencionCreate, ActividadCreate, ViajeCreate)
+from .estadisticas import get_estadisticas_generales, invalidate_estadisticas
+from . import busqueda, proyecciones, referencias, resumenes
+from .paginacion import Orden, paginar
+
+ORDEN_PERSONAS = (Orden(PersonaMayor.per_apellido), Orden(PersonaMayor.per_nombre), Orden(PersonaMayor.id))
+ORDEN_ATENCIONES = (Orden(Atencion.at_fecha, descendente=True), Orden(Atencion.id, descendente=True))
 
 # CRUD para Personas Mayores
 def get_persona_mayor(db: Session, persona_id: int):
@@ -28,34 +33,33 @@ def get_personas_mayores(
         limit: int = 100,
         search: Optional[str] = None,
         macrosector_id: Optional[int] = None,
-        genero_id: Optional[int] = None
+        genero_id: Optional[int] = None,
+        cursor: Optional[str] = None
 ):
-    query = db.query(PersonaMayor).options(
-        joinedload(PersonaMayor.genero),
-        joinedload(PersonaMayor.nacionalidad),
-        joinedload(PersonaMayor.macrosector),
-        joinedload(PersonaMayor.unidad_vecinal)
-    )
+    """Página de FilaPersona para el listado (solo las columnas que se muestran)"""
+    query = proyecciones.unir_persona(db.query(*proyecciones.COLUMNAS_PERSONA))
 
+    orden = ORDEN_PERSONAS
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (PersonaMayor.per_nombre.ilike(search)) |
-            (PersonaMayor.per_apellido.ilike(search)) |
-            (PersonaMayor.per_rut.ilike(search))
-        )
+        query = query.filter(busqueda.filtro_personas(db, search))
+        ranking = busqueda.ranking_personas(db, search)
+        if ranking is not None:
+            # Ordenado por relevancia: los cursores guardan un offset en vez de una clave
+            query = query.order_by(desc(ranking), *[o.columna for o in ORDEN_PERSONAS])
+            orden = None
     if macrosector_id:
         query = query.filter(PersonaMayor.per_macid == macrosector_id)
     if genero_id:
         query = query.filter(PersonaMayor.per_genid == genero_id)
 
-    return query.offset(skip).limit(limit).all()
+    return paginar(query, orden, limit, cursor, skip, proyeccion=proyecciones.FilaPersona)
 
 def create_persona_mayor(db: Session, persona: PersonaMayorCreate):
     db_persona = PersonaMayor(**persona.model_dump())
     db.add(db_persona)
     db.commit()
     db.refresh(db_persona)
+    invalidate_estadisticas()
     return db_persona
 
 def update_persona_mayor(db: Session, persona_id: int, persona: PersonaMayorUpdate):
@@ -65,6 +69,7 @@ def update_persona_mayor(db: Session, persona_id: int, persona: PersonaMayorUpda
             setattr(db_persona, field, value)
         db.commit()
         db.refresh(db_persona)
+        invalidate_estadisticas()
     return db_persona
 
 def delete_persona_mayor(db: Session, persona_id: int):
@@ -72,6 +77,7 @@ def delete_persona_mayor(db: Session, persona_id: int):
     if db_persona:
         db.delete(db_persona)
         db.commit()
+        invalidate_estadisticas()
     return db_persona
 
 # Función para calcular edad
@@ -80,18 +86,26 @@ def calcular_edad(fecha_nacimiento: date) -> int:
     edad = today.year - fecha_nacimiento.year - ((today.month, today.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
     return edad
 
+def restar_años(fecha: date, años: int) -> date:
+    """Misma fecha `años` atrás (el 29 de febrero pasa a 28 en años no bisiestos)"""
+    try:
+        return fecha.replace(year=fecha.year - años)
+    except ValueError:
+        return fecha.replace(year=fecha.year - años, day=28)
+
 # CRUD para entidades de referencia
+# (servidas desde el cache de app/crud/referencias.py como tuplas inmutables)
 def get_generos(db: Session):
-    return db.query(Genero).all()
+    return referencias.get_generos(db)
 
 def get_nacionalidades(db: Session):
-    return db.query(Nacionalidad).all()
+    return referencias.get_nacionalidades(db)
 
 def get_macrosectores(db: Session):
-    return db.query(Macrosector).all()
+    return referencias.get_macrosectores(db)
 
 def get_unidades_vecinales(db: Session):
-    return db.query(UnidadVecinal).all()
+    return referencias.get_unidades_vecinales(db)
 
 # CRUD para Especialistas
 def get_especialista(db: Session, especialista_id: int):
@@ -121,9 +135,9 @@ def get_atencion(db: Session, atencion_id: int):
         joinedload(Atencion.especialista)
     ).filter(Atencion.id == atencion_id).first()
 
-def get_atenciones(db: Session, skip: int = 0, limit: int = 100, persona_id: Optional[int] = None, especialista_id: Optional[int] = None, fecha_desde: Optional[date] = None, fecha_hasta: Optional[date] =None):
-
-    query = db.query(Atencion).options(joinedload(Atencion.personas), joinedload(Atencion.especialista))
+def get_atenciones(db: Session, skip: int = 0, limit: int = 100, persona_id: Optional[int] = None, especialista_id: Optional[int] = None, fecha_desde: Optional[date] = None, fecha_hasta: Optional[date] =None, cursor: Optional[str] = None):
+    """Página de FilaAtencion (fecha, persona y especialista) para el listado"""
+    query = proyecciones.unir_atencion(db.query(*proyecciones.COLUMNAS_ATENCION))
     if persona_id:
         query = query.filter(Atencion.at_perid == persona_id)
 
@@ -136,17 +150,78 @@ def get_atenciones(db: Session, skip: int = 0, limit: int = 100, persona_id: Opt
     if fecha_hasta:
         query = query.filter(Atencion.at_fecha <= fecha_hasta)
     
-    return query.order_by(desc(Atencion.at_fecha)).offset(skip).limit(limit).all()
+    return paginar(query, ORDEN_ATENCIONES, limit, cursor, skip, proyeccion=proyecciones.FilaAtencion)
 
 def create_atencion(db: Session, atencion: AtencionCreate):
     db_atencion = Atencion(**atencion.model_dump())
     db.add(db_atencion)
+    if db_atencion.at_perid:
+        registrar_ultima_atencion(db, db_atencion.at_perid, db_atencion.at_fecha)
+        resumenes.registrar_atencion(db, db_atencion.at_perid, db_atencion.at_espid)
     db.commit()
     db.refresh(db_atencion)
+    invalidate_estadisticas()
+    return db_atencion
+
+def delete_atencion(db: Session, atencion_id: int):
+    db_atencion = db.query(Atencion).filter(Atencion.id == atencion_id).first()
+    if db_atencion:
+        persona_id, especialista_id = db_atencion.at_perid, db_atencion.at_espid
+        db.delete(db_atencion)
+        db.flush()
+        if persona_id:
+            recalcular_ultima_atencion(db, persona_id)
+            resumenes.registrar_atencion(db, persona_id, especialista_id, delta=-1)
+        db.commit()
+        invalidate_estadisticas()
     return db_atencion
 
+# per_ultima_atencion: se adelanta al crear una atención y se recalcula al borrarla
+
+def registrar_ultima_atencion(db: Session, persona_id: int, fecha: date):
+    """Adelanta la última atención de la persona si `fecha` es más reciente (sin commit)"""
+    db.execute(
+        update(PersonaMayor)
+        .where(PersonaMayor.id == persona_id)
+        .where(or_(PersonaMayor.per_ultima_atencion.is_(None), PersonaMayor.per_ultima_atencion < fecha))
+        .values(per_ultima_atencion=fecha)
+    )
+
+def _ultima_atencion_subquery():
+    return select(func.max(Atencion.at_fecha)).where(
+        Atencion.at_perid == PersonaMayor.id).scalar_subquery()
+
+def recalcular_ultima_atencion(db: Session, persona_id: int):
+    """Recalcula la última atención de una persona desde su historial (sin commit)"""
+    db.execute(
+        update(PersonaMayor)
+        .where(PersonaMayor.id == persona_id)
+        .values(per_ultima_atencion=_ultima_atencion_subquery()),
+        execution_options={"synchronize_session": "fetch"}
+    )
+
+def reconstruir_ultimas_atenciones(db: Session, lote: int = 5000) -> int:
+    """Recalcula per_ultima_atencion para todas las personas, por rangos de id con un commit
+    por lote para no bloquear la tabla completa. Devuelve la cantidad de personas procesadas."""
+    max_id = db.scalar(select(func.max(PersonaMayor.id))) or 0
+    procesadas = 0
+    for desde in range(0, max_id, lote):
+        result = db.execute(
+            update(PersonaMayor)
+            .where(PersonaMayor.id > desde, PersonaMayor.id <= desde + lote)
+            .values(per_ultima_atencion=_ultima_atencion_subquery()),
+            execution_options={"synchronize_session": False}
+        )
+        procesadas += result.rowcount
+        db.commit()
+    invalidate_estadisticas()
+    return procesadas
+
 def get_atenciones_persona(db: Session, persona_id: int, limit: int = 100):
-    return db.query(Atencion).filter(Atencion.at_perid == persona_id).order_by(desc(Atencion.at_fecha)).limit(limit).all()
+    # Especialista y especialidad son muchos-a-uno: joinedload los trae en la misma consulta
+    return db.query(Atencion).options(
+        joinedload(Atencion.especialista).joinedload(Especialista.especialidad)
+    ).filter(Atencion.at_perid == persona_id).order_by(desc(Atencion.at_fecha)).limit(limit).all()
 
 # CRUD para Actividades
 
@@ -158,6 +233,7 @@ def create_actividad(db: Session, actividad: ActividadCreate):
     db.add(db_actividad)
     db.commit()
     db.refresh(db_actividad)
+    invalidate_estadisticas()
     return db_actividad
 
 def get_talleres(db: Session):
@@ -172,70 +248,30 @@ def create_viaje(db: Session, viaje: ViajeCreate):
     db.add(db_viaje)
     db.commit()
     db.refresh(db_viaje)
+    invalidate_estadisticas()
     return db_viaje
 
 # Funciones de Estadísticas y Reportes
 def get_estadistics_generales(db: Session):
-    total_personas = db.query(PersonaMayor).count()
-    total_atenciones = db.query(Atencion).count()
-    total_actividades = db.query(Actividad).count()
-    total_viajes = db.query(Viaje).count()
-
-    # Personas por género
-    personas_por_genero = db.query(
-        Genero.genero,
-        func.count(PersonaMayor.id).label('count')
-    ).outerjoin(PersonaMayor).group_by(Genero.genero).all()
-    
-    # Personas por macrosector
-    personas_por_macrosector = db.query(
-        Macrosector.macrosector,
-        func.count(PersonaMayor.id).label('count')
-    ).outerjoin(PersonaMayor).group_by(Macrosector.macrosector).all()
-    
-    return {
-        "total_personas": total_personas,
-        "total_atenciones": total_atenciones,
-        "total_actividades": total_actividades,
-        "total_viajes": total_viajes,
-        "personas_por_genero": {item[0]: item[1] for item in personas_por_genero},
-        "personas_por_macrosector": {item[0]: item[1] for item in personas_por_macrosector}
-    }
+    return get_estadisticas_generales(db)
 
 def get_personas_con_resumen(db: Session, skip: int = 0, limit: int = 100):
-    '''Obtiene personas con resumen de sus atenciones.'''
-    query = db.query(
-        PersonaMayor.id,
-        PersonaMayor.per_nombre,
-        PersonaMayor.per_apellido,
-        PersonaMayor.per_rut,
-        PersonaMayor.per_birthdate,
-        Genero.genero,
-        Macrosector.macrosector,
-        func.count(Atencion.id).label('total_atenciones'),
-        func.max(Atencion.at_fecha).label('ultima_atencion')
-    ).outerjoin(Genero).outerjoin(Macrosector).outerjoin(Atencion).group_by(
-        PersonaMayor.id,
-        PersonaMayor.per_nombre,
-        PersonaMayor.per_apellido,
-        PersonaMayor.per_rut,
-        PersonaMayor.per_birthdate,
-        Genero.genero,
-        Macrosector.macrosector
-    ).offset(skip).limit(limit).all()
+    '''Obtiene personas con resumen de sus atenciones (tablas precalculadas de app/crud/resumenes.py).'''
+    filas = resumenes.get_resumen_personas(db, skip=skip, limit=limit)
+    por_especialidad = resumenes.get_atenciones_por_especialidad(db, [item.id for item in filas])
 
     resultado = []
-    for item in query:
-        edad = calcular_edad(item.per_birthdate)
+    for item in filas:
         resultado.append({
             'id': item.id,
             'nombre_completo': f"{item.per_nombre} {item.per_apellido}",
             'rut': item.per_rut,
-            'edad': edad,
+            'edad': item.edad,
             'genero': item.genero,
             'macrosector': item.macrosector,
-            'total_atenciones': item.total_atenciones or 0,
-            'ultima_atencion': item.ultima_atencion
+            'total_atenciones': item.total_atenciones,
+            'ultima_atencion': item.ultima_atencion,
+            'atenciones_por_especialidad': por_especialidad[item.id]
         })
     
     return resultado
@@ -253,20 +289,21 @@ def buscar_personas_avanzado(
     skip: int = 0,
     limit: int = 100
 ):
-    """Búsqueda avanzada de personas mayores"""
+    """Búsqueda avanzada de personas mayores (todos los filtros se resuelven en SQL)"""
     query = db.query(PersonaMayor).options(
         joinedload(PersonaMayor.genero),
-        joinedload(PersonaMayor.macrosector)
+        joinedload(PersonaMayor.macrosector),
+        joinedload(PersonaMayor.unidad_vecinal)
     )
     
     if nombre:
-        query = query.filter(PersonaMayor.per_nombre.ilike(f"%{nombre}%"))
+        query = query.filter(busqueda.filtro_texto(db, PersonaMayor.per_nombre, nombre))
     
     if apellido:
-        query = query.filter(PersonaMayor.per_apellido.ilike(f"%{apellido}%"))
+        query = query.filter(busqueda.filtro_texto(db, PersonaMayor.per_apellido, apellido))
         
     if rut:
-        query = query.filter(PersonaMayor.per_rut.ilike(f"%{rut}%"))
+        query = query.filter(busqueda.filtro_rut(rut))
         
     if macrosector_id:
         query = query.filter(PersonaMayor.per_macid == macrosector_id)
@@ -274,42 +311,31 @@ def buscar_personas_avanzado(
     if genero_id:
         query = query.filter(PersonaMayor.per_genid == genero_id)
     
-    # Filtro por edad (requiere cálculo en Python para ser más preciso)
-    personas = query.offset(skip).limit(limit).all()
+    # Filtro por edad como rango de fechas de nacimiento, sin calcular la edad fila a fila
+    hoy = date.today()
+    if edad_min is not None:
+        query = query.filter(PersonaMayor.per_birthdate <= restar_años(hoy, edad_min))
+    if edad_max is not None:
+        query = query.filter(PersonaMayor.per_birthdate > restar_años(hoy, edad_max + 1))
     
-    if edad_min is not None or edad_max is not None or con_atenciones is not None:
-        resultado = []
-        for persona in personas:
-            edad = calcular_edad(persona.per_birthdate)
-            
-            # Filtro por edad
-            if edad_min is not None and edad < edad_min:
-                continue
-            if edad_max is not None and edad > edad_max:
-                continue
-                
-            # Filtro por atenciones
-            if con_atenciones is not None:
-                tiene_atenciones = db.query(Atencion).filter(Atencion.at_perid == persona.id).first() is not None
-                if con_atenciones and not tiene_atenciones:
-                    continue
-                if not con_atenciones and tiene_atenciones:
-                    continue
-            
-            resultado.append(persona)
-        
-        return resultado
+    # Filtro por atenciones como EXISTS / NOT EXISTS correlacionado
+    if con_atenciones is not None:
+        tiene_atenciones = db.query(Atencion.id).filter(Atencion.at_perid == PersonaMayor.id).exists()
+        query = query.filter(tiene_atenciones if con_atenciones else ~tiene_atenciones)
     
-    return personas
+    return query.order_by(PersonaMayor.per_apellido, PersonaMayor.per_nombre, PersonaMayor.id).offset(skip).limit(limit).all()
 
-def get_reporte_atenciones_mensual(db: Session, año: int, mes: int):
-    """Reporte de atenciones por mes"""
-    from datetime import date
+def _rango_mes(año: int, mes: int):
     fecha_inicio = date(año, mes, 1)
     if mes == 12:
         fecha_fin = date(año + 1, 1, 1)
     else:
         fecha_fin = date(año, mes + 1, 1)
+    return fecha_inicio, fecha_fin
+
+def get_reporte_atenciones_mensual(db: Session, año: int, mes: int):
+    """Reporte de atenciones por mes"""
+    fecha_inicio, fecha_fin = _rango_mes(año, mes)
     
     atenciones = db.query(Atencion).options(
         joinedload(Atencion.personas),
@@ -321,26 +347,59 @@ def get_reporte_atenciones_mensual(db: Session, año: int, mes: int):
     
     return atenciones
 
-def get_personas_sin_atencion_reciente(db: Session, dias: int = 90):
-    """Obtiene personas que no han tenido atención en X días"""
-    from datetime import date, timedelta
+COLUMNAS_REPORTE_ATENCIONES = (
+    "Fecha", "RUT", "Nombre", "Apellido", "Especialista", "Especialidad")
+
+def iter_reporte_atenciones_mensual(db: Session, año: int, mes: int, lote: int = 1000):
+    """Filas planas del reporte mensual, leídas por lotes con un cursor del lado del servidor.
+
+    Devuelve tuplas (no objetos ORM) en el orden de COLUMNAS_REPORTE_ATENCIONES.
+    """
+    fecha_inicio, fecha_fin = _rango_mes(año, mes)
+    stmt = select(
+        Atencion.at_fecha,
+        PersonaMayor.per_rut,
+        PersonaMayor.per_nombre,
+        PersonaMayor.per_apellido,
+        Especialista.esp_nombre,
+        Especialista.esp_apellido,
+        Especialidad.espe_especialidad,
+    ).join(
+        PersonaMayor, Atencion.at_perid == PersonaMayor.id
+    ).outerjoin(
+        Especialista, Atencion.at_espid == Especialista.id
+    ).outerjoin(
+        Especialidad, Especialista.esp_espeid == Especialidad.id
+    ).where(
+        Atencion.at_fecha >= fecha_inicio,
+        Atencion.at_fecha < fecha_fin
+    ).order_by(Atencion.at_fecha, Atencion.id)
+
+    # yield_per activa stream_results: psycopg2 usa un cursor con nombre y trae `lote` filas por vez
+    for fecha, rut, nombre, apellido, esp_nombre, esp_apellido, especialidad in db.execute(
+            stmt.execution_options(yield_per=lote)):
+        especialista = f"{esp_nombre} {esp_apellido}" if esp_nombre else None
+        yield fecha, rut, nombre, apellido, especialista, especialidad
+
+def get_personas_sin_atencion_reciente(
+        db: Session,
+        dias: int = 90,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None
+):
+    """Personas sin atención en los últimos `dias` días (o nunca atendidas), paginadas.
+
+    Usa per_ultima_atencion: las nunca atendidas y luego las de atención más antigua
+    forman un prefijo del índice ix_per_mayores_ultima_atencion.
+    """
     fecha_limite = date.today() - timedelta(days=dias)
-    
-    # Subquery para obtener la última atención de cada persona
-    subquery = db.query(
-        Atencion.at_perid,
-        func.max(Atencion.at_fecha).label('ultima_atencion')
-    ).group_by(Atencion.at_perid).subquery()
-    
-    # Personas con última atención anterior a fecha_limite o sin atenciones
-    personas = db.query(PersonaMayor).options(
+    query = db.query(PersonaMayor).options(
         joinedload(PersonaMayor.genero),
         joinedload(PersonaMayor.macrosector)
-    ).outerjoin(
-        subquery, PersonaMayor.id == subquery.c.at_perid
     ).filter(
-        (subquery.c.ultima_atencion < fecha_limite) | 
-        (subquery.c.ultima_atencion == None)
-    ).all()
-    
-    return personas
\ No newline at end of file
+        or_(PersonaMayor.per_ultima_atencion.is_(None), PersonaMayor.per_ultima_atencion < fecha_limite)
+    ).order_by(PersonaMayor.per_ultima_atencion.asc().nullsfirst(), PersonaMayor.id)
+
+    # La columna admite NULL, así que los cursores guardan un offset en vez de una clave
+    return paginar(query, None, limit, cursor, skip, con_total=True)
\ No newline at end of file
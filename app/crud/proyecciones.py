@@ -0,0 +1,78 @@
+from datetime import date
+from typing import NamedTuple, Optional
+from ..models.personas_mayores import (
+    PersonaMayor, Genero, Macrosector, Especialista, Especialidad, Atencion, Viaje)
+
+# Proyecciones para las páginas de listado: solo las columnas que muestra la plantilla, con las
+# etiquetas de las tablas de referencia resueltas con OUTER JOIN en el mismo SELECT. Las filas son
+# NamedTuple, no entidades: no pasan por el identity map ni guardan estado del ORM. Los campos
+# llevan el nombre de la columna (`key`) para que la paginación por cursor arme sus claves igual
+# que con entidades. Las columnas de cada proyección van en el mismo orden que sus campos.
+
+
+class FilaPersona(NamedTuple):
+    id: int
+    per_rut: str
+    per_nombre: str
+    per_apellido: str
+    per_birthdate: date
+    per_direccion: Optional[str]
+    genero: Optional[str]
+    macrosector: Optional[str]
+
+
+COLUMNAS_PERSONA = (
+    PersonaMayor.id, PersonaMayor.per_rut, PersonaMayor.per_nombre, PersonaMayor.per_apellido,
+    PersonaMayor.per_birthdate, PersonaMayor.per_direccion, Genero.genero, Macrosector.macrosector)
+
+
+def unir_persona(query):
+    return query.outerjoin(Genero, PersonaMayor.per_genid == Genero.id).outerjoin(
+        Macrosector, PersonaMayor.per_macid == Macrosector.id)
+
+
+class FilaAtencion(NamedTuple):
+    id: int
+    at_fecha: date
+    at_perid: Optional[int]
+    per_nombre: Optional[str]
+    per_apellido: Optional[str]
+    esp_nombre: Optional[str]
+    esp_apellido: Optional[str]
+
+
+COLUMNAS_ATENCION = (
+    Atencion.id, Atencion.at_fecha, Atencion.at_perid, PersonaMayor.per_nombre,
+    PersonaMayor.per_apellido, Especialista.esp_nombre, Especialista.esp_apellido)
+
+
+def unir_atencion(query):
+    return query.outerjoin(PersonaMayor, Atencion.at_perid == PersonaMayor.id).outerjoin(
+        Especialista, Atencion.at_espid == Especialista.id)
+
+
+class FilaEspecialista(NamedTuple):
+    id: int
+    esp_rut: str
+    esp_nombre: str
+    esp_apellido: str
+    especialidad: Optional[str]
+
+
+COLUMNAS_ESPECIALISTA = (
+    Especialista.id, Especialista.esp_rut, Especialista.esp_nombre, Especialista.esp_apellido,
+    Especialidad.espe_especialidad)
+
+
+def unir_especialista(query):
+    return query.outerjoin(Especialidad, Especialista.esp_espeid == Especialidad.id)
+
+
+class FilaViaje(NamedTuple):
+    id: int
+    via_viaje: str
+    via_destino: str
+    via_fecha: date
+
+
+COLUMNAS_VIAJE = (Viaje.id, Viaje.via_viaje, Viaje.via_destino, Viaje.via_fecha)
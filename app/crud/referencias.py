@@ -0,0 +1,103 @@
+from typing import NamedTuple, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from ..models.personas_mayores import Genero, Nacionalidad, Macrosector, UnidadVecinal
+from ..cache import TTLCache
+from ..config import settings
+
+# Tablas de referencia (casi nunca cambian): se cargan al iniciar y se sirven desde memoria
+# como tuplas inmutables. Las escrituras vía ORM las invalidan; el TTL cubre los cambios
+# hechos por otros procesos o directamente en la base de datos.
+
+
+class GeneroRef(NamedTuple):
+    id: int
+    genero: str
+
+
+class NacionalidadRef(NamedTuple):
+    id: int
+    nacionalidad: str
+
+
+class MacrosectorRef(NamedTuple):
+    id: int
+    macrosector: str
+
+
+class UnidadVecinalRef(NamedTuple):
+    id: int
+    unidadvecinal: str
+
+
+_TABLAS = {
+    "generos": (Genero, GeneroRef),
+    "nacionalidades": (Nacionalidad, NacionalidadRef),
+    "macrosectores": (Macrosector, MacrosectorRef),
+    "unidades_vecinales": (UnidadVecinal, UnidadVecinalRef),
+}
+
+_cache = TTLCache(ttl=settings.referencias_cache_ttl, maxsize=len(_TABLAS))
+
+
+def invalidate_referencias(nombre: str = None):
+    _cache.invalidate(nombre)
+
+
+def _cargar(db: Session, nombre: str) -> tuple:
+    modelo, tupla = _TABLAS[nombre]
+    columnas = [getattr(modelo, campo) for campo in tupla._fields]
+    filas = db.execute(select(*columnas).order_by(modelo.id)).all()
+    return tuple(tupla(*fila) for fila in filas)
+
+
+def get_referencia(db: Session, nombre: str) -> tuple:
+    datos = _cache.get(nombre)
+    if datos is None:
+        datos = _cargar(db, nombre)
+        _cache.set(nombre, datos)
+    return datos
+
+
+def get_generos(db: Session) -> Tuple[GeneroRef, ...]:
+    return get_referencia(db, "generos")
+
+
+def get_nacionalidades(db: Session) -> Tuple[NacionalidadRef, ...]:
+    return get_referencia(db, "nacionalidades")
+
+
+def get_macrosectores(db: Session) -> Tuple[MacrosectorRef, ...]:
+    return get_referencia(db, "macrosectores")
+
+
+def get_unidades_vecinales(db: Session) -> Tuple[UnidadVecinalRef, ...]:
+    return get_referencia(db, "unidades_vecinales")
+
+
+def precargar(db: Session):
+    """Carga todas las tablas de referencia en el cache (se llama al iniciar la aplicación)"""
+    for nombre in _TABLAS:
+        get_referencia(db, nombre)
+
+
+def _registrar_invalidacion(modelo, nombre: str):
+    def invalidar(mapper, connection, target):
+        # Se invalida ya y otra vez tras el commit, por si otra petición recargó el valor anterior
+        invalidate_referencias(nombre)
+        sesion = object_session(target)
+        if sesion is not None:
+            sesion.info.setdefault("referencias_modificadas", set()).add(nombre)
+
+    for evento in ("after_insert", "after_update", "after_delete"):
+        event.listen(modelo, evento, invalidar)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(sesion):
+    for nombre in sesion.info.pop("referencias_modificadas", ()):
+        invalidate_referencias(nombre)
+
+
+for _nombre, (_modelo, _) in _TABLAS.items():
+    _registrar_invalidacion(_modelo, _nombre)
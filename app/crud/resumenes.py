@@ -0,0 +1,151 @@
+from datetime import date
+from typing import Dict, Optional, Sequence
+from sqlalchemy import Integer, case, cast, delete, extract, func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.personas_mayores import (
+    PersonaMayor, Genero, Macrosector, Atencion, Especialista, Especialidad,
+    ResumenAtenciones, ResumenAtencionesEspecialidad)
+
+# Resumen de atenciones por persona (total y por especialidad), mantenido en cada alta o baja
+# de una atención para no agregar todo el historial al listar. Una atención cuenta en la
+# especialidad actual de su especialista: si el especialista cambia de especialidad o se borra,
+# `mover_especialista` traslada sus contadores en la misma transacción. `reconstruir_resumenes`
+# recalcula todo desde cero con la misma regla.
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _sumar(db: Session, modelo, claves: dict, columna, delta: int):
+    """Suma `delta` al contador de la fila `claves`, creándola si no existe (INSERT ... ON CONFLICT)"""
+    insert_dialecto = _INSERTS.get(db.get_bind().dialect.name)
+    if insert_dialecto is not None:
+        stmt = insert_dialecto(modelo).values(**claves, **{columna.key: delta})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(claves),
+            set_={columna.key: columna + delta}
+        )
+        db.execute(stmt)
+        return
+    # Otros motores: actualizar y, si no había fila, insertarla
+    filtro = [getattr(modelo, clave) == valor for clave, valor in claves.items()]
+    if db.execute(update(modelo).where(*filtro).values({columna: columna + delta})).rowcount == 0:
+        db.execute(insert(modelo).values(**claves, **{columna.key: delta}))
+
+
+def _especialidad_de(db: Session, especialista_id: Optional[int]) -> Optional[int]:
+    if not especialista_id:
+        return None
+    return db.scalar(select(Especialista.esp_espeid).where(Especialista.id == especialista_id))
+
+
+def registrar_atencion(db: Session, persona_id: int, especialista_id: Optional[int], delta: int = 1):
+    """Ajusta los contadores de la persona por una atención creada (+1) o borrada (-1). Sin commit."""
+    _sumar(db, ResumenAtenciones, {"rap_perid": persona_id}, ResumenAtenciones.rap_total, delta)
+    especialidad_id = _especialidad_de(db, especialista_id)
+    if especialidad_id:
+        _sumar(
+            db, ResumenAtencionesEspecialidad,
+            {"rae_perid": persona_id, "rae_espeid": especialidad_id},
+            ResumenAtencionesEspecialidad.rae_total, delta
+        )
+
+
+def mover_especialista(db: Session, especialista_id: int, anterior: Optional[int], nueva: Optional[int]):
+    """Pasa las atenciones del especialista de la especialidad `anterior` a `nueva` (None: sin
+    especialidad, como al borrarlo). Se llama antes de cambiar o borrar el especialista. Sin commit."""
+    if anterior == nueva:
+        return
+    del_especialista = (Atencion.at_espid == especialista_id, Atencion.at_perid.is_not(None))
+    if anterior:
+        total_persona = select(func.count(Atencion.id)).where(
+            *del_especialista, Atencion.at_perid == ResumenAtencionesEspecialidad.rae_perid).scalar_subquery()
+        db.execute(
+            update(ResumenAtencionesEspecialidad)
+            .where(ResumenAtencionesEspecialidad.rae_espeid == anterior,
+                   ResumenAtencionesEspecialidad.rae_perid.in_(select(Atencion.at_perid).where(*del_especialista)))
+            .values(rae_total=ResumenAtencionesEspecialidad.rae_total - total_persona)
+        )
+    if nueva:
+        por_persona = select(Atencion.at_perid, literal(nueva), func.count(Atencion.id)).where(
+            *del_especialista).group_by(Atencion.at_perid)
+        insert_dialecto = _INSERTS.get(db.get_bind().dialect.name)
+        if insert_dialecto is None:
+            for persona_id, _, total in db.execute(por_persona):
+                _sumar(db, ResumenAtencionesEspecialidad, {"rae_perid": persona_id, "rae_espeid": nueva},
+                       ResumenAtencionesEspecialidad.rae_total, total)
+            return
+        stmt = insert_dialecto(ResumenAtencionesEspecialidad).from_select(
+            ["rae_perid", "rae_espeid", "rae_total"], por_persona)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["rae_perid", "rae_espeid"],
+            set_={"rae_total": ResumenAtencionesEspecialidad.rae_total + stmt.excluded.rae_total}
+        ))
+
+
+def reconstruir_resumenes(db: Session) -> int:
+    """Recalcula ambas tablas de resumen desde at_atenciones en una transacción.
+    Devuelve la cantidad de personas con atenciones."""
+    db.execute(delete(ResumenAtencionesEspecialidad))
+    db.execute(delete(ResumenAtenciones))
+    totales = select(Atencion.at_perid, func.count(Atencion.id)).where(
+        Atencion.at_perid.is_not(None)).group_by(Atencion.at_perid)
+    resultado = db.execute(insert(ResumenAtenciones).from_select(["rap_perid", "rap_total"], totales))
+    por_especialidad = select(Atencion.at_perid, Especialista.esp_espeid, func.count(Atencion.id)).join(
+        Especialista, Atencion.at_espid == Especialista.id
+    ).where(
+        Atencion.at_perid.is_not(None), Especialista.esp_espeid.is_not(None)
+    ).group_by(Atencion.at_perid, Especialista.esp_espeid)
+    db.execute(insert(ResumenAtencionesEspecialidad).from_select(
+        ["rae_perid", "rae_espeid", "rae_total"], por_especialidad))
+    db.commit()
+    return resultado.rowcount
+
+
+def _edad(fecha_nacimiento, hoy: date):
+    """Edad cumplida a `hoy` (fecha de Python, como calcular_edad) calculada por el motor"""
+    cumple_despues = extract("month", fecha_nacimiento) * 100 + extract("day", fecha_nacimiento) > hoy.month * 100 + hoy.day
+    # EXTRACT devuelve numeric en PostgreSQL
+    edad = hoy.year - extract("year", fecha_nacimiento) - case((cumple_despues, 1), else_=0)
+    return cast(edad, Integer).label("edad")
+
+
+def get_resumen_personas(db: Session, skip: int = 0, limit: int = 100):
+    """Página de personas con su total y última atención, leída de las tablas precalculadas"""
+    return db.execute(
+        select(
+            PersonaMayor.id,
+            PersonaMayor.per_nombre,
+            PersonaMayor.per_apellido,
+            PersonaMayor.per_rut,
+            PersonaMayor.per_birthdate,
+            _edad(PersonaMayor.per_birthdate, date.today()),
+            Genero.genero,
+            Macrosector.macrosector,
+            func.coalesce(ResumenAtenciones.rap_total, literal(0)).label("total_atenciones"),
+            PersonaMayor.per_ultima_atencion.label("ultima_atencion"),
+        )
+        .outerjoin(Genero, PersonaMayor.per_genid == Genero.id)
+        .outerjoin(Macrosector, PersonaMayor.per_macid == Macrosector.id)
+        .outerjoin(ResumenAtenciones, ResumenAtenciones.rap_perid == PersonaMayor.id)
+        .order_by(PersonaMayor.per_apellido, PersonaMayor.per_nombre, PersonaMayor.id)
+        .offset(skip).limit(limit)
+    ).all()
+
+
+def get_atenciones_por_especialidad(db: Session, persona_ids: Sequence[int]) -> Dict[int, Dict[str, int]]:
+    """{persona_id: {especialidad: total}} para las personas indicadas"""
+    resultado: Dict[int, Dict[str, int]] = {persona_id: {} for persona_id in persona_ids}
+    if not persona_ids:
+        return resultado
+    filas = db.execute(
+        select(ResumenAtencionesEspecialidad.rae_perid, Especialidad.espe_especialidad,
+               ResumenAtencionesEspecialidad.rae_total)
+        .join(Especialidad, ResumenAtencionesEspecialidad.rae_espeid == Especialidad.id)
+        .where(ResumenAtencionesEspecialidad.rae_perid.in_(persona_ids),
+               ResumenAtencionesEspecialidad.rae_total > 0)
+        .order_by(Especialidad.espe_especialidad)
+    )
+    for persona_id, especialidad, total in filas:
+        resultado[persona_id][especialidad] = total
+    return resultado
@@ -1,20 +1,28 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import List, Optional
 from app.models.personas_mayores import Talleres
 from app.schemas.talleres import TallerCreate, TallerUpdate
+from app.crud.paginacion import Orden, paginar, paginar_async
+
+ORDEN_TALLERES = (Orden(Talleres.tal_taller), Orden(Talleres.id))
+
+
+def _filtro_busqueda(search: str):
+    search_term = f"%{search}%"
+    return Talleres.tal_taller.ilike(search_term)
 
 
 def get_taller(db: Session, taller_id: int):
     return db.query(Talleres).filter(Talleres.id == taller_id).first()
 
 
-def get_talleres(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_talleres(db: Session, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
     query = db.query(Talleres)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(Talleres.tal_taller.ilike(search_term))
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(_filtro_busqueda(search))
+    return paginar(query, ORDEN_TALLERES, limit, cursor, skip, con_total)
 
 
 def create_taller(db: Session, taller: TallerCreate):
@@ -47,6 +55,53 @@ def delete_taller(db: Session, taller_id: int):
 def count_talleres(db: Session, search: str = None):
     query = db.query(Talleres)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(Talleres.tal_taller.ilike(search_term))
+        query = query.filter(_filtro_busqueda(search))
     return query.count()
+
+
+# Variantes asíncronas (AsyncSession)
+
+async def get_taller_async(db: AsyncSession, taller_id: int):
+    return await db.get(Talleres, taller_id)
+
+
+async def get_talleres_async(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
+    stmt = select(Talleres)
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await paginar_async(db, stmt, ORDEN_TALLERES, limit, cursor, skip, con_total)
+
+
+async def count_talleres_async(db: AsyncSession, search: str = None):
+    stmt = select(func.count(Talleres.id))
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await db.scalar(stmt)
+
+
+async def create_taller_async(db: AsyncSession, taller: TallerCreate):
+    db_taller = Talleres(**taller.dict())
+    db.add(db_taller)
+    await db.commit()
+    await db.refresh(db_taller)
+    return db_taller
+
+
+async def update_taller_async(db: AsyncSession, taller_id: int, taller_update: TallerUpdate):
+    db_taller = await db.get(Talleres, taller_id)
+    if db_taller:
+        update_data = taller_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_taller, field, value)
+        await db.commit()
+        await db.refresh(db_taller)
+    return db_taller
+
+
+async def delete_taller_async(db: AsyncSession, taller_id: int):
+    # Las relaciones se cargan antes para que el flush no dispare un lazy load
+    db_taller = await db.get(Talleres, taller_id, options=[selectinload(Talleres.personas)])
+    if db_taller:
+        await db.delete(db_taller)
+        await db.commit()
+    return db_taller
@@ -1,9 +1,31 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+from typing import NamedTuple, Optional
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
+from ..cache import TTLCache
+from ..config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+# Pool acotado para bcrypt: limita cuántos hashes se calculan en paralelo sin bloquear el event loop
+_hash_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt")
+
+
+class UsuarioSesion(NamedTuple):
+    """Datos del usuario autenticado que se guardan en cache (sin el hash de la contraseña)"""
+    id: int
+    usr: str
+
+
+# Usuarios autenticados por nombre de usuario; se invalida en cada escritura sobre `users`
+_user_cache = TTLCache(ttl=settings.user_cache_ttl)
+
+def invalidate_user_cache(username: Optional[str] = None):
+    _user_cache.invalidate(username)
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -11,6 +33,18 @@ def get_user(db: Session, user_id: int):
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.usr == username).first()
 
+def get_session_user(db: Session, username: str) -> Optional[UsuarioSesion]:
+    """Usuario de la sesión actual, consultando la base de datos solo si no está en cache"""
+    cached = _user_cache.get(username)
+    if cached is not None:
+        return cached
+    user = get_user_by_username(db, username)
+    if user is None:
+        return None
+    cached = UsuarioSesion(id=user.id, usr=user.usr)
+    _user_cache.set(username, cached)
+    return cached
+
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(User).offset(skip).limit(limit).all()
 
@@ -23,15 +57,63 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_user_cache(db_user.usr)
+    return db_user
+
+def update_user(db: Session, user_id: int, user: UserUpdate):
+    db_user = get_user(db, user_id)
+    if db_user:
+        username_anterior = db_user.usr
+        update_data = user.model_dump(exclude_unset=True)
+        if update_data.get("psswrd"):
+            update_data["psswrd"] = pwd_context.hash(update_data["psswrd"])
+        for field, value in update_data.items():
+            if value is not None:
+                setattr(db_user, field, value)
+        db.commit()
+        db.refresh(db_user)
+        invalidate_user_cache(username_anterior)
+        invalidate_user_cache(db_user.usr)
     return db_user
 
+def delete_user(db: Session, user_id: int):
+    db_user = get_user(db, user_id)
+    if db_user:
+        db.delete(db_user)
+        db.commit()
+        invalidate_user_cache(db_user.usr)
+    return db_user
+
+def _rehash_password(db: Session, user: User, new_hash: str):
+    """Guarda el hash recalculado con el costo configurado actualmente"""
+    user.psswrd = new_hash
+    db.commit()
+
 def authenticate_user(db: Session, username: str, password: str):
     user = get_user_by_username(db, username)
     if not user:
         return False
-    if not pwd_context.verify(password, user.psswrd):
+    valid, new_hash = pwd_context.verify_and_update(password, user.psswrd)
+    if not valid:
+        return False
+    if new_hash:
+        _rehash_password(db, user, new_hash)
+    return user
+
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """Igual que authenticate_user, pero bcrypt corre en el pool dedicado y la sesión en el threadpool"""
+    user = await run_in_threadpool(get_user_by_username, db, username)
+    if not user:
+        return False
+    loop = asyncio.get_running_loop()
+    valid, new_hash = await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, password, user.psswrd
+    )
+    if not valid:
         return False
+    if new_hash:
+        await run_in_threadpool(_rehash_password, db, user, new_hash)
     return user
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
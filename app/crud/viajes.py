@@ -1,25 +1,33 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import List, Optional
 from app.models.personas_mayores import Viaje
+from app.crud.estadisticas import invalidate_estadisticas
 from app.schemas.viajes import ViajeCreate, ViajeUpdate
+from app.crud.paginacion import Orden, paginar, paginar_async
+from app.crud import proyecciones
+
+ORDEN_VIAJES = (Orden(Viaje.via_fecha, descendente=True), Orden(Viaje.id, descendente=True))
+
+
+def _filtro_busqueda(search: str):
+    search_term = f"%{search}%"
+    return or_(
+        Viaje.via_destino.ilike(search_term),
+        Viaje.via_viaje.ilike(search_term)
+    )
 
 
 def get_viaje(db: Session, viaje_id: int):
     return db.query(Viaje).filter(Viaje.id == viaje_id).first()
 
 
-def get_viajes(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_viajes(db: Session, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
     query = db.query(Viaje)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Viaje.via_destino.ilike(search_term),
-                Viaje.via_descripcion.ilike(search_term)
-            )
-        )
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(_filtro_busqueda(search))
+    return paginar(query, ORDEN_VIAJES, limit, cursor, skip, con_total)
 
 
 def create_viaje(db: Session, viaje: ViajeCreate):
@@ -27,6 +35,7 @@ def create_viaje(db: Session, viaje: ViajeCreate):
     db.add(db_viaje)
     db.commit()
     db.refresh(db_viaje)
+    invalidate_estadisticas()
     return db_viaje
 
 
@@ -38,6 +47,7 @@ def update_viaje(db: Session, viaje_id: int, viaje_update: ViajeUpdate):
             setattr(db_viaje, field, value)
         db.commit()
         db.refresh(db_viaje)
+        invalidate_estadisticas()
     return db_viaje
 
 
@@ -46,17 +56,65 @@ def delete_viaje(db: Session, viaje_id: int):
     if db_viaje:
         db.delete(db_viaje)
         db.commit()
+        invalidate_estadisticas()
     return db_viaje
 
 
 def count_viajes(db: Session, search: str = None):
     query = db.query(Viaje)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Viaje.via_destino.ilike(search_term),
-                Viaje.via_descripcion.ilike(search_term)
-            )
-        )
+        query = query.filter(_filtro_busqueda(search))
     return query.count()
+
+
+# Variantes asíncronas (AsyncSession)
+
+async def get_viaje_async(db: AsyncSession, viaje_id: int):
+    return await db.get(Viaje, viaje_id)
+
+
+async def get_viajes_async(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, cursor: Optional[str] = None, con_total: bool = False):
+    """Página de FilaViaje para el listado"""
+    stmt = select(*proyecciones.COLUMNAS_VIAJE)
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await paginar_async(db, stmt, ORDEN_VIAJES, limit, cursor, skip, con_total,
+                               proyeccion=proyecciones.FilaViaje)
+
+
+async def count_viajes_async(db: AsyncSession, search: str = None):
+    stmt = select(func.count(Viaje.id))
+    if search:
+        stmt = stmt.where(_filtro_busqueda(search))
+    return await db.scalar(stmt)
+
+
+async def create_viaje_async(db: AsyncSession, viaje: ViajeCreate):
+    db_viaje = Viaje(**viaje.dict())
+    db.add(db_viaje)
+    await db.commit()
+    await db.refresh(db_viaje)
+    invalidate_estadisticas()
+    return db_viaje
+
+
+async def update_viaje_async(db: AsyncSession, viaje_id: int, viaje_update: ViajeUpdate):
+    db_viaje = await db.get(Viaje, viaje_id)
+    if db_viaje:
+        update_data = viaje_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_viaje, field, value)
+        await db.commit()
+        await db.refresh(db_viaje)
+        invalidate_estadisticas()
+    return db_viaje
+
+
+async def delete_viaje_async(db: AsyncSession, viaje_id: int):
+    # Las asistencias se cargan antes para que el flush no dispare un lazy load
+    db_viaje = await db.get(Viaje, viaje_id, options=[selectinload(Viaje.personas)])
+    if db_viaje:
+        await db.delete(db_viaje)
+        await db.commit()
+        invalidate_estadisticas()
+    return db_viaje
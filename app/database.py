@@ -1,9 +1,108 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from .config import settings
 
-engine = create_engine(settings.database_url)
+
+class PoolStats:
+    """Telemetría del pool: conexiones en uso, overflow e histograma de espera"""
+
+    # Límites superiores (segundos) de los buckets del histograma de espera
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * len(self.BUCKETS)
+            self._wait_total = 0.0
+            self._checkouts = 0
+            self._timeouts = 0
+
+    def observe_wait(self, seconds: float):
+        with self._lock:
+            self._checkouts += 1
+            self._wait_total += seconds
+            for i, limite in enumerate(self.BUCKETS):
+                if seconds <= limite:
+                    self._counts[i] += 1
+                    break
+
+    def record_timeout(self):
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            histograma = {}
+            acumulado = 0
+            for limite, count in zip(self.BUCKETS, self._counts):
+                acumulado += count
+                histograma["+Inf" if limite == float("inf") else str(limite)] = acumulado
+            data = {
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_histogram": histograma,
+            }
+        data.update({
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "max_overflow": getattr(pool, "_max_overflow", None),
+        })
+        return data
+
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class _WaitTimingMixin:
+    """Mide cuánto espera cada checkout por una conexión libre"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self._stats.record_timeout()
+            raise
+        finally:
+            self._stats.observe_wait(time.perf_counter() - inicio)
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    _stats = pool_stats
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    _stats = async_pool_stats
+
+
+def _engine_options(poolclass=InstrumentedQueuePool) -> dict:
+    if settings.database_url.startswith("sqlite"):
+        # SQLite no usa QueuePool; FastAPI ejecuta dependencias síncronas en otro hilo
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+engine = create_engine(settings.database_url, **_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -12,4 +111,44 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def _async_database_url(url: str) -> str:
+    """Traduce la URL síncrona al driver asíncrono (asyncpg / aiosqlite)"""
+    if settings.async_database_url:
+        return settings.async_database_url
+    driver, resto = url.split("://", 1)
+    if driver.startswith("postgresql"):
+        return f"postgresql+asyncpg://{resto}"
+    if driver.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{resto}"
+    return url
+
+
+# El engine asíncrono se crea al primer uso para no exigir el driver a quien no lo necesita
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        opciones = _engine_options(InstrumentedAsyncQueuePool)
+        opciones.pop("connect_args", None)
+        _async_engine = create_async_engine(_async_database_url(settings.database_url), **opciones)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+def get_pool_stats() -> dict:
+    """Estado actual de los pools de los engines compartidos"""
+    stats = pool_stats.snapshot(engine.pool)
+    if _async_engine is not None:
+        stats["async"] = async_pool_stats.snapshot(_async_engine.pool)
+    return stats
@@ -0,0 +1,148 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+# Exportación en streaming: cada generador produce el archivo por partes a medida que
+# consume las filas, sin armarlo completo en memoria.
+
+
+class _Buffer(io.RawIOBase):
+    """Destino de escritura no posicionable que se vacía después de cada parte entregada"""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._partes.append(bytes(data))
+        return len(data)
+
+    def vaciar(self) -> bytes:
+        data = b"".join(self._partes)
+        self._partes.clear()
+        return data
+
+
+def generar_csv(encabezados: Sequence[str], filas: Iterable[Sequence], filas_por_parte: int = 500) -> Iterator[str]:
+    """CSV con BOM para que Excel detecte UTF-8, entregado en partes de `filas_por_parte` filas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(encabezados)
+    for i, fila in enumerate(filas, 1):
+        writer.writerow(fila)
+        if i % filas_por_parte == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilo 1: fechas con formato propio dd/mm/yyyy (los numFmtId desde 164 son personalizados)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '</styleSheet>'
+)
+
+_EPOCA_EXCEL = date(1899, 12, 30)
+
+
+def _celda(valor) -> str:
+    if valor is None:
+        return "<c/>"
+    if isinstance(valor, bool):
+        return f'<c t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f"<c><v>{valor}</v></c>"
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    if isinstance(valor, date):
+        return f'<c s="1"><v>{(valor - _EPOCA_EXCEL).days}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+
+
+def _fila_xlsx(fila) -> str:
+    return "<row>" + "".join(_celda(valor) for valor in fila) + "</row>"
+
+
+def generar_xlsx(encabezados: Sequence[str], filas: Iterable[Sequence], hoja: str = "Hoja1",
+                 filas_por_parte: int = 500) -> Iterator[bytes]:
+    """Libro XLSX de una hoja con celdas inline, escrito directamente al ZIP en streaming"""
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as libro:
+        libro.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        libro.writestr("_rels/.rels", _RELS)
+        libro.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        libro.writestr("xl/styles.xml", _STYLES)
+        libro.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(hoja[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        )
+        yield buffer.vaciar()
+
+        with libro.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as hoja_xml:
+            hoja_xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>' + _fila_xlsx(encabezados).encode()
+            )
+            partes = []
+            for fila in filas:
+                partes.append(_fila_xlsx(fila))
+                if len(partes) >= filas_por_parte:
+                    hoja_xml.write("".join(partes).encode())
+                    partes.clear()
+                    yield buffer.vaciar()
+            hoja_xml.write(("".join(partes) + "</sheetData></worksheet>").encode())
+    yield buffer.vaciar()
@@ -1,23 +1,40 @@
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .database import engine, Base
-from .api.routes import auth, personas_mayores, atenciones, reportes, talleres, organizaciones, especialistas, especialidades, actividades, viajes
+from .api.routes import auth, personas_mayores, atenciones, reportes, talleres, organizaciones, especialistas, especialidades, actividades, viajes, asistencias
 from .api.routes.auth import get_current_user
-from .crud import personas_mayores as crud_pm
-from .models.personas_mayores import PersonaMayor, Atencion
-from .database import get_db
+from .crud import estadisticas as crud_estadisticas
+from .crud import referencias as crud_referencias
+from .database import get_db, get_pool_stats, SessionLocal
+from .config import settings
+from .metricas import MetricasMiddleware, metricas
+from .versiones import CondicionalMiddleware
+from .consultas_lentas import registro as registro_consultas_lentas
+from .cargas_perezosas import registro as registro_cargas_perezosas
+from .plantillas import templates, precompilar
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+import hmac
 
 # Crear tablas
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precarga de tablas de referencia: formularios y filtros no consultan la base de datos
+    with SessionLocal() as db:
+        crud_referencias.precargar(db)
+    # Compilar las plantillas antes de la primera petición
+    precompilar()
+    yield
+
 app = FastAPI(
     title="Sistema Municipal - Dirección de Personas Mayores",
     version="1.0.0",
-    description="Sistema de gestión para la Dirección de Personas Mayores"
+    description="Sistema de gestión para la Dirección de Personas Mayores",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -29,21 +46,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Archivos estáticos y templates
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
-
-# Agregar filtro personalizado para calcular edad
-from datetime import date
+# 304 para los listados sin cambios desde la última visita (ver app/versiones.py)
+app.add_middleware(CondicionalMiddleware)
 
-def age_filter(birthdate):
-    """Calcula la edad basada en la fecha de nacimiento"""
-    if not birthdate:
-        return 0
-    today = date.today()
-    return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
+# Latencia y sentencias SQL por ruta (ver /sistema/metricas)
+app.add_middleware(MetricasMiddleware)
 
-templates.env.filters['age'] = age_filter
+# Archivos estáticos
+app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Incluir rutas
 app.include_router(auth.router, prefix="/auth")
@@ -56,6 +66,7 @@ app.include_router(especialistas.router, prefix="/especialistas")
 app.include_router(especialidades.router, prefix="/especialidades")
 app.include_router(actividades.router, prefix="/actividades")
 app.include_router(viajes.router, prefix="/viajes")
+app.include_router(asistencias.router)
 
 @app.get("/", response_class=HTMLResponse)
 def dashboard(
@@ -63,23 +74,12 @@ def dashboard(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    # Estadísticas básicas para el dashboard
+    # Estadísticas del dashboard (una sola consulta, servida desde cache)
     try:
-        total_personas = db.query(PersonaMayor).count()
-        total_atenciones = db.query(Atencion).count()
-        personas_recientes = crud_pm.get_personas_mayores(db, limit=5)
-        
-        estadisticas = {
-            "total_personas": total_personas,
-            "total_atenciones": total_atenciones,
-            "total_actividades": 0,
-            "total_viajes": 0,
-            "personas_por_genero": {},
-            "personas_por_macrosector": {}
-        }
-        
+        estadisticas = crud_estadisticas.get_estadisticas_generales(db)
+        personas_recientes = crud_estadisticas.get_personas_recientes(db, limit=5)
         atenciones_recientes = []
-        personas_sin_atencion_count = 0
+        personas_sin_atencion_count = estadisticas["personas_sin_atencion"]
         
     except Exception as e:
         # Si hay error, usar datos básicos
@@ -108,11 +108,53 @@ def dashboard(
 def login_redirect():
     return RedirectResponse(url="/auth/login")
 
+@app.get("/sistema/pool", response_model=dict)
+def estado_pool(current_user = Depends(get_current_user)):
+    """Telemetría del pool de conexiones a la base de datos"""
+    return get_pool_stats()
+
+@app.get("/sistema/metricas", response_class=PlainTextResponse)
+def exportar_metricas(request: Request, db: Session = Depends(get_db)):
+    """Métricas por ruta en formato Prometheus (sesión o METRICAS_TOKEN)"""
+    autorizacion = request.headers.get("authorization", "")
+    if not (settings.metricas_token and hmac.compare_digest(autorizacion, f"Bearer {settings.metricas_token}")):
+        get_current_user(request, db)
+    return PlainTextResponse(metricas.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/sistema/consultas-lentas", response_class=HTMLResponse)
+def consultas_lentas(request: Request, current_user = Depends(get_current_user)):
+    """Sentencias que superaron CONSULTAS_LENTAS_UMBRAL_MS, por tiempo total"""
+    return templates.TemplateResponse("sistema/consultas_lentas.html", {
+        "request": request,
+        "consultas": registro_consultas_lentas.top(),
+        "recientes": registro_consultas_lentas.recientes(20),
+        "umbral_ms": settings.consultas_lentas_umbral_ms
+    })
+
+@app.post("/sistema/consultas-lentas/limpiar")
+def limpiar_consultas_lentas(current_user = Depends(get_current_user)):
+    registro_consultas_lentas.limpiar()
+    return RedirectResponse(url="/sistema/consultas-lentas", status_code=303)
+
+@app.get("/sistema/cargas-perezosas", response_class=HTMLResponse)
+def cargas_perezosas(request: Request, current_user = Depends(get_current_user)):
+    """Relaciones cargadas a demanda (N+1), por ruta"""
+    return templates.TemplateResponse("sistema/cargas_perezosas.html", {
+        "request": request,
+        "cargas": registro_cargas_perezosas.por_ruta(),
+        "estricto": settings.orm_estricto
+    })
+
+@app.post("/sistema/cargas-perezosas/limpiar")
+def limpiar_cargas_perezosas(current_user = Depends(get_current_user)):
+    registro_cargas_perezosas.limpiar()
+    return RedirectResponse(url="/sistema/cargas-perezosas", status_code=303)
+
 # Middleware para redirigir a login si no está autenticado
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
     # Rutas que no requieren autenticación
-    public_paths = ["/auth/login", "/auth/logout", "/static", "/docs", "/openapi.json"]
+    public_paths = ["/auth/login", "/auth/logout", "/static", "/docs", "/openapi.json", "/sistema/metricas"]
     
     if any(request.url.path.startswith(path) for path in public_paths):
         response = await call_next(request)
@@ -127,8 +169,17 @@ async def auth_middleware(request: Request, call_next):
     return response
 
 # Manejo de errores
+# Rutas de la API JSON: sus errores se responden como JSON, no con la página de error
+PREFIJOS_API = ("/asistencias",)
+
+def _espera_json(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return request.url.path.startswith(PREFIJOS_API) or ("application/json" in accept and "text/html" not in accept)
+
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
+    if _espera_json(request):
+        return JSONResponse({"detail": getattr(exc, "detail", "Not Found")}, status_code=404)
     return templates.TemplateResponse("errors/404.html", {"request": request}, status_code=404)
 
 @app.exception_handler(500)
@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+# Instrumentación por petición: latencia por ruta y cantidad/tiempo de sentencias SQL,
+# medidos con eventos del Engine (aplica a todos los engines, también al asíncrono).
+# Se exponen en formato de texto de Prometheus en /sistema/metricas.
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, float("inf"))
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus (sin lock propio: lo protege Metricas)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.total += 1
+        self.suma += valor
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.counts[i] += 1
+                break
+
+    def acumulado(self):
+        acumulado = 0
+        for limite, count in zip(self.buckets, self.counts):
+            acumulado += count
+            yield ("+Inf" if limite == float("inf") else _numero(limite)), acumulado
+
+
+class _ConsultasPeticion:
+    __slots__ = ("scope", "consultas", "segundos", "inicios")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.consultas = 0
+        self.segundos = 0.0
+        self.inicios = {}
+
+
+# Objeto mutable: los hilos del threadpool reciben una copia del contexto que apunta al mismo
+_peticion_actual: ContextVar[Optional[_ConsultasPeticion]] = ContextVar("peticion_actual", default=None)
+
+
+def ruta_actual() -> Optional[str]:
+    """Plantilla de la ruta de la petición en curso (None fuera de una petición)"""
+    peticion = _peticion_actual.get()
+    return _ruta(peticion.scope) if peticion is not None else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    peticion = _peticion_actual.get()
+    if peticion is not None:
+        peticion.inicios[id(cursor)] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    peticion = _peticion_actual.get()
+    if peticion is not None:
+        inicio = peticion.inicios.pop(id(cursor), None)
+        peticion.consultas += 1
+        if inicio is not None:
+            peticion.segundos += time.perf_counter() - inicio
+
+
+class _MetricasRuta:
+    __slots__ = ("latencia", "consultas", "segundos_sql", "sobre_presupuesto")
+
+    def __init__(self):
+        self.latencia = Histograma(BUCKETS_LATENCIA)
+        self.consultas = Histograma(BUCKETS_CONSULTAS)
+        self.segundos_sql = 0.0
+        self.sobre_presupuesto = 0
+
+
+class Metricas:
+    """Acumuladores por (método, ruta) para todo el proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._rutas: Dict[Tuple[str, str], _MetricasRuta] = {}
+
+    def registrar(self, metodo: str, ruta: str, segundos: float, peticion: _ConsultasPeticion) -> bool:
+        """Registra una petición; devuelve True si superó el presupuesto de consultas"""
+        excedida = 0 < settings.metricas_presupuesto_consultas < peticion.consultas
+        with self._lock:
+            metricas = self._rutas.get((metodo, ruta))
+            if metricas is None:
+                metricas = self._rutas[(metodo, ruta)] = _MetricasRuta()
+            metricas.latencia.observar(segundos)
+            metricas.consultas.observar(peticion.consultas)
+            metricas.segundos_sql += peticion.segundos
+            if excedida:
+                metricas.sobre_presupuesto += 1
+        return excedida
+
+    def exportar(self) -> str:
+        """Texto en formato de exposición de Prometheus"""
+        with self._lock:
+            rutas = sorted(self._rutas.items())
+            lineas = []
+
+            def encabezado(nombre, tipo, ayuda):
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+
+            def histograma(nombre, campo):
+                for (metodo, ruta), metricas in rutas:
+                    h = getattr(metricas, campo)
+                    etiquetas = _etiquetas(method=metodo, route=ruta)
+                    for limite, acumulado in h.acumulado():
+                        lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+                    lineas.append(f"{nombre}_sum{{{etiquetas}}} {_numero(h.suma)}")
+                    lineas.append(f"{nombre}_count{{{etiquetas}}} {h.total}")
+
+            encabezado("http_request_duration_seconds", "histogram", "Latencia de las peticiones HTTP por ruta")
+            histograma("http_request_duration_seconds", "latencia")
+            encabezado("http_request_sql_queries", "histogram", "Sentencias SQL ejecutadas por petición")
+            histograma("http_request_sql_queries", "consultas")
+            encabezado("http_request_sql_seconds_total", "counter", "Tiempo total en sentencias SQL por ruta")
+            for (metodo, ruta), metricas in rutas:
+                lineas.append(
+                    f"http_request_sql_seconds_total{{{_etiquetas(method=metodo, route=ruta)}}} "
+                    f"{_numero(metricas.segundos_sql)}")
+            encabezado("http_requests_over_query_budget_total", "counter",
+                       f"Peticiones con más de {settings.metricas_presupuesto_consultas} sentencias SQL")
+            for (metodo, ruta), metricas in rutas:
+                lineas.append(
+                    f"http_requests_over_query_budget_total{{{_etiquetas(method=metodo, route=ruta)}}} "
+                    f"{metricas.sobre_presupuesto}")
+        return "\n".join(lineas) + "\n"
+
+
+metricas = Metricas()
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if valor != int(valor) else str(int(valor))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(**etiquetas) -> str:
+    return ",".join(f'{nombre}="{_escapar(str(valor))}"' for nombre, valor in etiquetas.items())
+
+
+def _ruta(scope) -> str:
+    # Plantilla de la ruta (/personas/{persona_id}) para no crear una serie por cada id
+    route = scope.get("route")
+    return getattr(route, "path", None) or "sin_ruta"
+
+
+class MetricasMiddleware:
+    """Middleware ASGI: mide hasta el último fragmento del cuerpo, así las respuestas en
+    streaming incluyen las consultas que hacen mientras se envían"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        peticion = _ConsultasPeticion(scope)
+        token = _peticion_actual.set(peticion)
+        inicio = time.perf_counter()
+        registrada = False
+
+        def registrar():
+            nonlocal registrada
+            if registrada:
+                return
+            registrada = True
+            segundos = time.perf_counter() - inicio
+            ruta = _ruta(scope)
+            if metricas.registrar(scope["method"], ruta, segundos, peticion):
+                logger.warning(
+                    "%s %s ejecutó %d sentencias SQL (presupuesto %d) en %.3fs",
+                    scope["method"], scope["path"], peticion.consultas,
+                    settings.metricas_presupuesto_consultas, segundos)
+
+        async def send_instrumentado(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                registrar()
+
+        try:
+            await self.app(scope, receive, send_instrumentado)
+        finally:
+            registrar()
+            _peticion_actual.reset(token)
@@ -1,6 +1,12 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
+from ..config import settings
+
+# Relaciones de personas, atenciones y especialistas: con ORM_ESTRICTO un acceso que necesite SQL
+# lanza un error, así cada lectura de app/crud/ declara sus joinedload/selectinload. Sin él se
+# cargan a demanda y app/cargas_perezosas.py registra la ruta que lo hizo.
+CARGA_PEREZOSA = "raise_on_sql" if settings.orm_estricto else "select"
 
 class PersonaMayor(Base):
     __tablename__ = "per_mayores"
@@ -18,22 +24,24 @@ class PersonaMayor(Base):
     per_benefvinculos = Column(Integer, ForeignKey("vin_vinculos.id", ondelete="SET NULL"))
     per_beneflimpieza = Column(Integer, ForeignKey("lim_limpiezacalef.id", ondelete="SET NULL"))
     per_benefprogcuidadores = Column(Integer, ForeignKey("pro_progcuidadores.id", ondelete="SET NULL"))
+    # Fecha de la atención más reciente (desnormalizada; la mantiene app/crud/personas_mayores.py)
+    per_ultima_atencion = Column(Date)
 
     # Relationships
-    genero = relationship("Genero", back_populates="personas")
-    nacionalidad = relationship("Nacionalidad", back_populates="personas")
-    macrosector = relationship("Macrosector", back_populates="personas")
-    unidad_vecinal = relationship("UnidadVecinal", back_populates="personas")
-    beneficio_vinculos = relationship("Vinculo", back_populates="personas")
-    beneficio_limpieza = relationship("LimpiezaCalefaccion", back_populates="personas")
-    beneficio_prog_cuidadores = relationship("ProgramaCuidadores", back_populates="personas")
+    genero = relationship("Genero", back_populates="personas", lazy=CARGA_PEREZOSA)
+    nacionalidad = relationship("Nacionalidad", back_populates="personas", lazy=CARGA_PEREZOSA)
+    macrosector = relationship("Macrosector", back_populates="personas", lazy=CARGA_PEREZOSA)
+    unidad_vecinal = relationship("UnidadVecinal", back_populates="personas", lazy=CARGA_PEREZOSA)
+    beneficio_vinculos = relationship("Vinculo", back_populates="personas", lazy=CARGA_PEREZOSA)
+    beneficio_limpieza = relationship("LimpiezaCalefaccion", back_populates="personas", lazy=CARGA_PEREZOSA)
+    beneficio_prog_cuidadores = relationship("ProgramaCuidadores", back_populates="personas", lazy=CARGA_PEREZOSA)
 
     # Many-to-many relationships
-    atenciones = relationship("Atencion", back_populates="personas")
-    actividades = relationship("Actividad", secondary="actividades_asist", back_populates="personas")
-    talleres = relationship("Talleres", secondary="talleres_asist", back_populates="personas")
-    viajes = relationship("Viaje", secondary="viajes_asist", back_populates="personas")
-    organizaciones = relationship("OrganizacionComunitaria", secondary="membresias_org", back_populates="personas")
+    atenciones = relationship("Atencion", back_populates="personas", lazy=CARGA_PEREZOSA)
+    actividades = relationship("Actividad", secondary="actividades_asist", back_populates="personas", lazy=CARGA_PEREZOSA)
+    talleres = relationship("Talleres", secondary="talleres_asist", back_populates="personas", lazy=CARGA_PEREZOSA)
+    viajes = relationship("Viaje", secondary="viajes_asist", back_populates="personas", lazy=CARGA_PEREZOSA)
+    organizaciones = relationship("OrganizacionComunitaria", secondary="membresias_org", back_populates="personas", lazy=CARGA_PEREZOSA)
 
 class Macrosector(Base):
     __tablename__ = "mac_macrosector"
@@ -107,8 +115,8 @@ class Especialista(Base):
     esp_espeid = Column(Integer, ForeignKey("espe_especialidades.id"))
     
     # Relationships
-    especialidad = relationship("Especialidad", back_populates="especialistas")
-    atenciones = relationship("Atencion", back_populates="especialista")
+    especialidad = relationship("Especialidad", back_populates="especialistas", lazy=CARGA_PEREZOSA)
+    atenciones = relationship("Atencion", back_populates="especialista", lazy=CARGA_PEREZOSA)
 
 
 class Especialidad(Base):
@@ -127,8 +135,8 @@ class Atencion(Base):
     at_espid = Column(Integer, ForeignKey("esp_especialistas.id", ondelete="SET NULL"))
     at_fecha = Column(Date, nullable=False)
 
-    personas = relationship("PersonaMayor", back_populates="atenciones")
-    especialista = relationship("Especialista", back_populates="atenciones")
+    personas = relationship("PersonaMayor", back_populates="atenciones", lazy=CARGA_PEREZOSA)
+    especialista = relationship("Especialista", back_populates="atenciones", lazy=CARGA_PEREZOSA)
 
 class Actividad(Base):
     __tablename__ = "act_actividades"
@@ -196,4 +204,38 @@ class MembresiaOrganizacion(Base):
     __tablename__ = "membresias_org"
     
     memorg_perid = Column(Integer, ForeignKey("per_mayores.id", ondelete="CASCADE"), primary_key=True)
-    memorg_orgid = Column(Integer, ForeignKey("org_com.id", ondelete="CASCADE"), primary_key=True)
\ No newline at end of file
+    memorg_orgid = Column(Integer, ForeignKey("org_com.id", ondelete="CASCADE"), primary_key=True)
+
+# Resúmenes de atenciones por persona (los mantiene app/crud/resumenes.py)
+class ResumenAtenciones(Base):
+    __tablename__ = "res_atenciones_persona"
+
+    rap_perid = Column(Integer, ForeignKey("per_mayores.id", ondelete="CASCADE"), primary_key=True)
+    rap_total = Column(Integer, nullable=False, default=0)
+
+class ResumenAtencionesEspecialidad(Base):
+    __tablename__ = "res_atenciones_especialidad"
+
+    rae_perid = Column(Integer, ForeignKey("per_mayores.id", ondelete="CASCADE"), primary_key=True)
+    rae_espeid = Column(Integer, ForeignKey("espe_especialidades.id", ondelete="CASCADE"), primary_key=True)
+    rae_total = Column(Integer, nullable=False, default=0)
+
+# Índices según las consultas reales (filtros por FK y rango de fechas, orden de la paginación por cursor).
+# Las migraciones los crean; check_indexes.py verifica que la base coincida con esta lista.
+Index("ix_at_atenciones_perid_fecha", Atencion.at_perid, Atencion.at_fecha.desc(), Atencion.id.desc())
+Index("ix_at_atenciones_espid_fecha", Atencion.at_espid, Atencion.at_fecha)
+Index("ix_at_atenciones_fecha", Atencion.at_fecha, Atencion.id)
+Index("ix_per_mayores_macid", PersonaMayor.per_macid)
+Index("ix_per_mayores_genid", PersonaMayor.per_genid)
+Index("ix_per_mayores_apellido_nombre", PersonaMayor.per_apellido, PersonaMayor.per_nombre, PersonaMayor.id)
+# En PostgreSQL la migración lo crea con NULLS FIRST (SQLite ya ordena así y no acepta la cláusula en índices)
+Index("ix_per_mayores_ultima_atencion", PersonaMayor.per_ultima_atencion, PersonaMayor.id)
+Index("ix_esp_especialistas_espeid", Especialista.esp_espeid)
+Index("ix_esp_especialistas_apellido_nombre", Especialista.esp_apellido, Especialista.esp_nombre, Especialista.id)
+Index("ix_act_actividades_fecha", Actividad.act_fecha, Actividad.id)
+Index("ix_via_viajes_fecha", Viaje.via_fecha, Viaje.id)
+# Las PK compuestas empiezan por la persona; la búsqueda por actividad/taller/viaje/organización necesita la otra columna
+Index("ix_actividades_asist_actid", ActividadAsistencia.actasist_actid)
+Index("ix_talleres_asist_talid", TallerAsistencia.talasist_talid)
+Index("ix_viajes_asist_viaid", ViajeAsistencia.viaasist_viaid)
+Index("ix_membresias_org_orgid", MembresiaOrganizacion.memorg_orgid)
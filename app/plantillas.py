@@ -0,0 +1,75 @@
+import logging
+from datetime import date
+from typing import Mapping, Optional
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateSyntaxError
+from .config import settings
+from .crud.personas_mayores import calcular_edad
+
+# Entorno Jinja2 único para toda la aplicación: un solo cache de plantillas compiladas por
+# proceso, filtros registrados en un solo lugar y bytecode en disco compartido entre workers
+# y reinicios. Sin DEBUG no se revisa si las plantillas cambiaron en cada render.
+#
+# Las páginas de listado definen un bloque `fragmento` con la tabla y la paginación: cuando la
+# petición viene de htmx (encabezado HX-Request) se renderiza solo ese bloque de la misma
+# plantilla, sin base.html, y la página reemplaza la tabla en su lugar.
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_PLANTILLAS = "app/templates"
+BLOQUE_FRAGMENTO = "fragmento"
+
+
+def age_filter(birthdate: Optional[date]) -> int:
+    """Edad a partir de la fecha de nacimiento (0 si no hay fecha)"""
+    return calcular_edad(birthdate) if birthdate else 0
+
+
+def _crear_entorno() -> Environment:
+    entorno = Environment(
+        loader=FileSystemLoader(DIRECTORIO_PLANTILLAS),
+        autoescape=True,
+        auto_reload=settings.debug,
+        # Sin directorio configurado, jinja2 usa uno propio dentro del directorio temporal
+        bytecode_cache=FileSystemBytecodeCache(settings.jinja_cache_dir) if settings.jinja_cache_dir
+        else FileSystemBytecodeCache(),
+    )
+    entorno.filters["age"] = age_filter
+    return entorno
+
+
+templates = Jinja2Templates(env=_crear_entorno())
+
+
+def precompilar() -> int:
+    """Compila todas las plantillas (se llama al iniciar). Devuelve cuántas se cargaron;
+    una plantilla con errores se informa sin impedir que la aplicación arranque."""
+    entorno = templates.env
+    compiladas = 0
+    for nombre in entorno.list_templates(extensions=["html"]):
+        try:
+            entorno.get_template(nombre)
+            compiladas += 1
+        except TemplateSyntaxError as e:
+            logger.warning("No se pudo compilar la plantilla %s (línea %s): %s", nombre, e.lineno, e.message)
+    return compiladas
+
+
+def es_fragmento(headers: Mapping[str, str]) -> bool:
+    """Petición de htmx que espera solo el fragmento; al restaurar el historial pide la página completa"""
+    return headers.get("hx-request") == "true" and headers.get("hx-history-restore-request") != "true"
+
+
+def renderizar_lista(request: Request, nombre: str, contexto: dict) -> HTMLResponse:
+    """Página de listado completa, o solo su bloque `fragmento` si la pide htmx"""
+    if es_fragmento(request.headers):
+        plantilla = templates.get_template(nombre)
+        bloque = plantilla.blocks[BLOQUE_FRAGMENTO]
+        respuesta = HTMLResponse("".join(bloque(plantilla.new_context(contexto))))
+    else:
+        respuesta = templates.TemplateResponse(nombre, contexto)
+    # La misma URL responde dos representaciones distintas
+    respuesta.headers["Vary"] = "HX-Request"
+    return respuesta
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class TallerAsistenciaBase(BaseModel):
@@ -72,3 +72,33 @@ class MembresiaOrg(MembresiaOrgBase):
 
     class Config:
         from_attributes = True
+
+
+# Inscripción de una lista completa de personas en un evento
+class RegistroAsistencias(BaseModel):
+    persona_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class ResultadoAsistencias(BaseModel):
+    registradas: List[int]
+    omitidas: List[int]
+
+
+class Asistente(BaseModel):
+    id: int
+    per_rut: str
+    per_nombre: str
+    per_apellido: str
+
+    class Config:
+        from_attributes = True
+
+
+class AsistenciaPersona(BaseModel):
+    tipo: str
+    id: int
+    nombre: str
+    fecha: Optional[date] = None
+
+    class Config:
+        from_attributes = True
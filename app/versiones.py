@@ -0,0 +1,161 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from itertools import chain
+from typing import Dict, Iterable, Tuple
+from jose import JWTError, jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.routing import Match
+from .config import settings
+from .plantillas import es_fragmento
+
+# Versiones de datos por tabla y GET condicional (ETag / If-None-Match) para las páginas de listado.
+# Cada commit que escribió en una tabla incrementa su versión: las escrituras del ORM se detectan
+# en el flush y los INSERT/UPDATE/DELETE masivos en do_orm_execute; lo que escribe por fuera de la
+# Session (COPY de app/crud/importacion.py) lo declara con `marcar_modificadas`.
+#
+# Las versiones viven en memoria del proceso, así que el ETag incluye un token del proceso (otro
+# worker o un reinicio nunca responde 304 con un ETag ajeno) y una ventana de tiempo que acota
+# cuánto tarda en verse una escritura hecha en otro worker, como el TTL de los demás caches.
+# La página completa y el fragmento de htmx comparten URL: el ETag distingue la representación.
+
+_CLAVE_SESION = "tablas_modificadas"
+
+_token_proceso = secrets.token_hex(8)
+_versiones: Dict[str, int] = defaultdict(int)
+_lock = threading.Lock()
+
+# Página de listado -> tablas de las que depende su HTML (las de referencia van en los filtros)
+RUTAS_CONDICIONALES: Dict[str, Tuple[str, ...]] = {
+    "/personas/": ("per_mayores", "gen_genero", "mac_macrosector"),
+    "/atenciones/": ("at_atenciones", "per_mayores", "esp_especialistas", "espe_especialidades"),
+    "/talleres/": ("tal_talleres",),
+    "/viajes/": ("via_viajes",),
+}
+
+
+def incrementar(*tablas: str):
+    with _lock:
+        for tabla in tablas:
+            _versiones[tabla] += 1
+
+
+def version(tablas: Iterable[str]) -> str:
+    with _lock:
+        return ".".join(str(_versiones[tabla]) for tabla in tablas)
+
+
+def marcar_modificadas(db: Session, *tablas: str):
+    """Registra tablas escritas sin pasar por el ORM; su versión sube con el commit"""
+    db.info.setdefault(_CLAVE_SESION, set()).update(tablas)
+
+
+@event.listens_for(Session, "after_flush")
+def _al_flush(session, flush_context):
+    tablas = session.info.setdefault(_CLAVE_SESION, set())
+    borrados = set(session.deleted)
+    for objeto in chain(session.new, session.dirty, borrados):
+        estado = inspect(objeto)
+        tablas.update(tabla.name for tabla in estado.mapper.tables)
+        # Las colecciones muchos-a-muchos que cambiaron (o las de un objeto borrado) escriben en
+        # la tabla de asociación; el historial no carga la colección si no estaba cargada
+        tablas.update(
+            r.secondary.name for r in estado.mapper.relationships
+            if r.secondary is not None and (objeto in borrados or estado.attrs[r.key].history.has_changes()))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _al_ejecutar(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabla = getattr(orm_execute_state.statement, "table", None)
+        if tabla is not None:
+            marcar_modificadas(orm_execute_state.session, tabla.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _al_confirmar(session):
+    tablas = session.info.pop(_CLAVE_SESION, None)
+    if tablas:
+        incrementar(*tablas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _al_revertir(session):
+    session.info.pop(_CLAVE_SESION, None)
+
+
+def _usuario(headers) -> str:
+    """Usuario del token de la cookie (firma y expiración verificadas, sin consultar la base)"""
+    cookie = SimpleCookie()
+    for nombre, valor in headers:
+        if nombre == b"cookie":
+            cookie.load(valor.decode("latin-1"))
+    if "access_token" not in cookie:
+        return ""
+    token = cookie["access_token"].value.strip('"')
+    if token.startswith("Bearer "):
+        token = token[7:]
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub") or ""
+    except JWTError:
+        return ""
+
+
+def calcular_etag(ruta: str, query: str, usuario: str, tablas: Iterable[str], fragmento: bool = False) -> str:
+    ventana = int(time.time() // settings.condicional_ventana) if settings.condicional_ventana > 0 else 0
+    representacion = "fragmento" if fragmento else "pagina"
+    clave = f"{_token_proceso}:{ventana}:{usuario}:{representacion}:{ruta}?{query}:{version(tablas)}"
+    return 'W/"' + hashlib.sha1(clave.encode()).hexdigest() + '"'
+
+
+def _marcar_ruta(scope):
+    """Resuelve la ruta como lo haría el router, para que las métricas atribuyan el 304 a su plantilla"""
+    for ruta in scope["app"].router.routes:
+        coincidencia, hijo = ruta.matches(scope)
+        if coincidencia == Match.FULL:
+            scope.update(hijo)
+            return
+
+
+class CondicionalMiddleware:
+    """Middleware ASGI: en las rutas de RUTAS_CONDICIONALES responde 304 si el If-None-Match
+    coincide, antes de consultar la base o renderizar; si no, agrega el ETag a la respuesta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tablas = RUTAS_CONDICIONALES.get(scope.get("path")) if scope["type"] == "http" else None
+        if tablas is None or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        usuario = _usuario(scope["headers"])
+        if not usuario:
+            # Sin sesión válida decide el resto de la aplicación (redirección al login)
+            await self.app(scope, receive, send)
+            return
+
+        # Las versiones se leen antes de consultar: una escritura durante el render cambia el próximo ETag
+        headers = Headers(scope=scope)
+        etag = calcular_etag(scope["path"], scope.get("query_string", b"").decode("latin-1"), usuario, tablas,
+                             es_fragmento(headers))
+        encabezados = [(b"etag", etag.encode()), (b"cache-control", b"private, no-cache")]
+        if etag in (e.strip() for e in headers.get("if-none-match", "").split(",")):
+            _marcar_ruta(scope)
+            # El 304 lleva el mismo Vary que las respuestas de renderizar_lista
+            await send({"type": "http.response.start", "status": 304,
+                        "headers": encabezados + [(b"vary", b"HX-Request")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_con_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message = {**message, "headers": list(message.get("headers", [])) + encabezados}
+            await send(message)
+
+        await self.app(scope, receive, send_con_etag)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark the main routes and CRUD functions against the configured database
+
+Usage: python benchmark.py [--iterations 30] [--save-baseline benchmark_baseline.json]
+       python benchmark.py --baseline benchmark_baseline.json
+
+Requests go through the ASGI app (FastAPI TestClient), so routing, templates and
+middleware are included. Use DATABASE_URL to point at SQLite or a local PostgreSQL
+filled with generate_benchmark_data.py. Exits with 1 if a scenario failed, or if
+against the baseline a scenario regressed or is missing from the run.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date, datetime
+sys.path.append('.')
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import SessionLocal, engine
+from app.models.personas_mayores import PersonaMayor, Atencion
+from app.crud import personas_mayores as crud_pm
+from app.crud import estadisticas as crud_estadisticas
+
+_consultas = 0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _contar(conn, cursor, statement, parameters, context, executemany):
+    global _consultas
+    _consultas += 1
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre valores ordenados"""
+    indice = max(0, min(len(valores) - 1, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[indice]
+
+
+def medir(funcion, iteraciones, calentamiento):
+    global _consultas
+    for _ in range(calentamiento):
+        funcion()
+    tiempos, consultas = [], []
+    for _ in range(iteraciones):
+        _consultas = 0
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(_consultas)
+    tiempos.sort()
+    return {
+        "p50": round(percentil(tiempos, 50), 2),
+        "p90": round(percentil(tiempos, 90), 2),
+        "p95": round(percentil(tiempos, 95), 2),
+        "p99": round(percentil(tiempos, 99), 2),
+        "max": round(tiempos[-1], 2),
+        "mean": round(sum(tiempos) / len(tiempos), 2),
+        "queries": max(consultas),
+    }
+
+
+def _ruta(cliente, path):
+    def pedir():
+        respuesta = cliente.get(path)
+        if respuesta.status_code != 200:
+            raise RuntimeError(f"GET {path} -> {respuesta.status_code}")
+        # Consumir el cuerpo completo (incluye las respuestas en streaming)
+        respuesta.content
+    return pedir
+
+
+def _crud(funcion, *args, **kwargs):
+    def llamar():
+        with SessionLocal() as db:
+            resultado = funcion(db, *args, **kwargs)
+            # Consumir generadores (iter_reporte_atenciones_mensual)
+            if hasattr(resultado, "__next__"):
+                for _ in resultado:
+                    pass
+    return llamar
+
+
+def _estadisticas_sin_cache(db):
+    crud_estadisticas.invalidate_estadisticas()
+    return crud_estadisticas.get_estadisticas_generales(db)
+
+
+def escenarios(cliente, persona_id, año, mes):
+    rutas = [
+        "/",
+        "/personas/",
+        "/personas/?search=gonzalez",
+        "/personas/?macrosector_id=1&genero_id=2",
+        f"/personas/{persona_id}",
+        "/atenciones/",
+        "/especialistas/",
+        "/talleres/",
+        "/actividades/",
+        "/viajes/",
+        "/reportes/personas-sin-atencion",
+        "/reportes/busqueda-avanzada?apellido=Soto&edad_min=70",
+        f"/reportes/atenciones-mensual.csv?año={año}&mes={mes}",
+        f"/asistencias/persona/{persona_id}",
+    ]
+    resultado = {f"GET {ruta}": _ruta(cliente, ruta) for ruta in rutas}
+    resultado.update({
+        "crud get_personas_con_resumen": _crud(crud_pm.get_personas_con_resumen, limit=50),
+        "crud get_atenciones(persona)": _crud(crud_pm.get_atenciones, persona_id=persona_id, limit=50),
+        "crud buscar_personas_avanzado": _crud(
+            crud_pm.buscar_personas_avanzado, apellido="Gonz", edad_min=70, con_atenciones=True, limit=50),
+        "crud get_personas_sin_atencion_reciente": _crud(crud_pm.get_personas_sin_atencion_reciente, 90),
+        "crud iter_reporte_atenciones_mensual": _crud(crud_pm.iter_reporte_atenciones_mensual, año, mes),
+        "crud get_estadisticas_generales (no cache)": _crud(_estadisticas_sin_cache),
+    })
+    return resultado
+
+
+def comparar(resultados, fallidos, base, tolerancia, only=None):
+    """Imprime la comparación y devuelve los escenarios que empeoraron, fallaron o faltan"""
+    regresiones = []
+    print(f"\n📊 Comparison with baseline from {base['meta'].get('date', '?')} (tolerance {tolerancia:.0%}):")
+    for nombre, error in fallidos.items():
+        print(f"   ❌ {nombre}: failed ({error})")
+        regresiones.append(nombre)
+    for nombre in base["results"]:
+        # Los que --only dejó fuera no cuentan como faltantes
+        if nombre not in resultados and nombre not in fallidos and (not only or only in nombre):
+            print(f"   ❌ {nombre}: missing from this run")
+            regresiones.append(nombre)
+    for nombre, actual in resultados.items():
+        anterior = base["results"].get(nombre)
+        if anterior is None:
+            print(f"   {nombre}: new scenario")
+            continue
+        delta = (actual["p95"] - anterior["p95"]) / anterior["p95"] if anterior["p95"] else 0.0
+        problemas = []
+        # Menos de 1 ms de diferencia se considera ruido
+        if delta > tolerancia and actual["p95"] - anterior["p95"] > 1:
+            problemas.append(f"p95 {anterior['p95']} -> {actual['p95']} ms")
+        if actual["queries"] > anterior["queries"]:
+            problemas.append(f"queries {anterior['queries']} -> {actual['queries']}")
+        marca = "❌" if problemas else "✅"
+        print(f"   {marca} {nombre}: p95 {delta:+.0%}" + (f" ({'; '.join(problemas)})" if problemas else ""))
+        if problemas:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", help="run only scenarios containing this text")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with this results file")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count(PersonaMayor.id)))
+        if not total:
+            print("❌ The database has no personas. Run generate_benchmark_data.py first.")
+            return 1
+        # Persona del medio y el mes con la atención más reciente: estables entre corridas
+        persona_id = db.scalar(select(PersonaMayor.id).order_by(PersonaMayor.id).offset(total // 2).limit(1))
+        ultima = db.scalar(select(func.max(Atencion.at_fecha))) or date.today()
+
+    cliente = TestClient(app)
+    login = cliente.post("/auth/login", data={"username": args.user, "password": args.password}, follow_redirects=False)
+    if "access_token" not in cliente.cookies:
+        print(f"❌ Could not log in as '{args.user}' (status {login.status_code})")
+        return 1
+
+    dialecto = engine.dialect.name
+    print(f"⏱️  Benchmarking on {dialecto} ({total} personas), {args.iterations} iterations per scenario...\n")
+    print(f"{'scenario':<58} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'queries':>8}")
+    resultados, fallidos = {}, {}
+    for nombre, funcion in escenarios(cliente, persona_id, ultima.year, ultima.month).items():
+        if args.only and args.only not in nombre:
+            continue
+        try:
+            r = medir(funcion, args.iterations, args.warmup)
+        except Exception as e:
+            print(f"{nombre:<58} ❌ {e}")
+            fallidos[nombre] = str(e)
+            continue
+        resultados[nombre] = r
+        print(f"{nombre:<58} {r['p50']:>8} {r['p95']:>8} {r['p99']:>8} {r['max']:>8} {r['queries']:>8}")
+
+    datos = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "dialect": dialecto,
+            "personas": total,
+            "iterations": args.iterations,
+        },
+        "results": resultados,
+        "failed": fallidos,
+    }
+    for destino in (args.output, args.save_baseline):
+        if destino:
+            with open(destino, "w", encoding="utf-8") as f:
+                json.dump(datos, f, indent=2, ensure_ascii=False)
+            print(f"\n💾 Results written to {destino}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        if base["meta"].get("dialect") != dialecto:
+            print(f"⚠️  Baseline was measured on {base['meta'].get('dialect')}, not {dialecto}")
+        regresiones = comparar(resultados, fallidos, base, args.tolerance, args.only)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} scenario(s) regressed")
+            return 1
+        print("\n✅ No regressions")
+    if fallidos:
+        print(f"\n❌ {len(fallidos)} scenario(s) failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
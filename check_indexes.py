@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Script to verify that the database has the indexes declared in the models
+"""
+import sys
+sys.path.append('.')
+
+from sqlalchemy import inspect
+from sqlalchemy.sql.elements import UnaryExpression
+
+from app.database import Base, engine
+from app.models import personas_mayores, user  # noqa: F401
+
+
+def _columnas(index):
+    """Columnas del índice del modelo como (nombre, 'desc'|'asc')"""
+    columnas = []
+    for expr in index.expressions:
+        orden = "asc"
+        # p. ej. nullsfirst(desc(columna)): se desenvuelve hasta llegar a la columna
+        while isinstance(expr, UnaryExpression):
+            if "desc" in str(expr.modifier):
+                orden = "desc"
+            expr = expr.element
+        columnas.append((expr.name, orden))
+    return columnas
+
+
+def _columnas_reflejadas(info):
+    sorting = info.get("column_sorting") or {}
+    return [
+        (nombre, "desc" if "desc" in sorting.get(nombre, ()) else "asc")
+        for nombre in info["column_names"]
+    ]
+
+
+def check_indexes(bind=engine):
+    """Devuelve la lista de problemas encontrados (vacía si todo coincide)"""
+    inspector = inspect(bind)
+    refleja_orden = bind.dialect.name != "sqlite"
+    tablas = set(inspector.get_table_names())
+    problemas = []
+
+    for table in Base.metadata.sorted_tables:
+        if not table.indexes:
+            continue
+        if table.name not in tablas:
+            problemas.append(f"{table.name}: la tabla no existe")
+            continue
+        reflejados = {info["name"]: info for info in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            esperado = _columnas(index)
+            info = reflejados.get(index.name)
+            if info is None:
+                problemas.append(f"{table.name}.{index.name}: falta el índice")
+                continue
+            actual = _columnas_reflejadas(info)
+            # SQLite no refleja el orden de las columnas: ahí solo se comparan los nombres
+            if not refleja_orden:
+                esperado = [(nombre, "asc") for nombre, _ in esperado]
+            if actual != esperado:
+                problemas.append(f"{table.name}.{index.name}: se esperaba {esperado}, la base tiene {actual}")
+
+    return problemas
+
+
+def main():
+    print(f"🔍 Checking indexes on {engine.url.render_as_string(hide_password=True)}...")
+    problemas = check_indexes()
+    if problemas:
+        print(f"\n❌ {len(problemas)} problem(s) found:")
+        for problema in problemas:
+            print(f"   - {problema}")
+        print("\nRun 'alembic upgrade head' to create the missing indexes.")
+        return 1
+    total = sum(len(table.indexes) for table in Base.metadata.sorted_tables)
+    print(f"✅ All {total} model indexes are present")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
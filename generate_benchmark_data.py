@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Script to fill the database with synthetic data at municipal scale for benchmarks
+
+Usage: python generate_benchmark_data.py [--personas 200000] [--atenciones 5000000] [--seed 42]
+
+The same seed and sizes always produce the same data. Run it on an empty database:
+missing tables are created as app/main.py does, and reference data and the admin user
+with init_data.py.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+sys.path.append('.')
+
+from sqlalchemy import func, insert, select
+
+from app.database import Base, SessionLocal, engine
+from app.models.personas_mayores import (
+    PersonaMayor, Genero, Especialidad,
+    Especialista, Atencion, Actividad, Talleres, Viaje,
+    ActividadAsistencia, TallerAsistencia, ViajeAsistencia)
+from app.crud import personas_mayores as crud_pm
+from app.crud import resumenes
+from app.models.user import User
+from init_data import init_reference_data, create_admin_user
+
+NOMBRES_F = ["María", "Rosa", "Ana", "Carmen", "Juana", "Luisa", "Elena", "Teresa", "Gladys",
+             "Olga", "Norma", "Silvia", "Patricia", "Marta", "Graciela", "Inés", "Mercedes", "Eliana"]
+NOMBRES_M = ["José", "Juan", "Luis", "Carlos", "Jorge", "Manuel", "Pedro", "Sergio", "Hugo",
+             "Héctor", "Raúl", "Mario", "Ricardo", "Víctor", "Óscar", "Fernando", "Segundo", "Arturo"]
+APELLIDOS = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva",
+             "Martínez", "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández",
+             "Torres", "Araya", "Flores", "Espinoza", "Valenzuela", "Castillo", "Tapia", "Reyes",
+             "Gutiérrez", "Castro", "Pizarro", "Álvarez", "Vásquez", "Sánchez", "Fernández"]
+CALLES = ["Av. Principal", "Los Aromos", "Las Violetas", "San Martín", "O'Higgins", "Prat",
+          "Los Robles", "El Bosque", "Independencia", "Pasaje Las Rosas"]
+
+LOTE = 20000
+
+
+def digito_verificador(numero: int) -> str:
+    """Dígito verificador del RUT (módulo 11)"""
+    suma, factor = 0, 2
+    while numero:
+        suma += (numero % 10) * factor
+        numero //= 10
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return {11: "0", 10: "K"}.get(resto, str(resto))
+
+
+def insertar(db, tabla, filas):
+    """Inserta por lotes con executemany (insertmanyvalues en PostgreSQL)"""
+    for i in range(0, len(filas), LOTE):
+        db.execute(insert(tabla), filas[i:i + LOTE])
+    db.commit()
+
+
+def ids(db, modelo, desde: int = 0):
+    return list(db.scalars(select(modelo.id).where(modelo.id > desde).order_by(modelo.id)))
+
+
+def generar_personas(db, rng, cantidad, hoy):
+    print(f"👵 Generating {cantidad} personas...")
+    generos = {g.genero: g.id for g in crud_pm.get_generos(db)}
+    femenino = generos.get("Femenino")
+    ids_genero = list(generos.values())
+    # Más mujeres que hombres en la población mayor
+    pesos_genero = [55 if g == femenino else 44 if g == generos.get("Masculino") else 1 for g in ids_genero]
+    nacionalidades = [n.id for n in crud_pm.get_nacionalidades(db)]
+    pesos_nacionalidad = [90] + [2] * (len(nacionalidades) - 1)
+    macrosectores = [m.id for m in crud_pm.get_macrosectores(db)]
+    # Macrosectores de tamaño desigual
+    pesos_macrosector = [rng.uniform(0.5, 3) for _ in macrosectores]
+    unidades = [u.id for u in crud_pm.get_unidades_vecinales(db)]
+
+    base_rut = 5_000_000 + (db.scalar(select(func.count(PersonaMayor.id))) or 0)
+    desde = db.scalar(select(func.max(PersonaMayor.id))) or 0
+    filas = []
+    for i in range(cantidad):
+        genid = rng.choices(ids_genero, pesos_genero)[0]
+        nombres = NOMBRES_F if genid == femenino else NOMBRES_M
+        # Edades de 60 a 100, concentradas entre los 60 y 75
+        edad_dias = int(rng.triangular(60, 100, 62) * 365.25)
+        numero = base_rut + i
+        filas.append({
+            "per_rut": f"{numero}-{digito_verificador(numero)}",
+            "per_nombre": rng.choice(nombres),
+            "per_apellido": f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}",
+            "per_birthdate": hoy - timedelta(days=edad_dias),
+            "per_direccion": f"{rng.choice(CALLES)} {rng.randint(1, 3000)}",
+            "per_genid": genid,
+            "per_nacid": rng.choices(nacionalidades, pesos_nacionalidad)[0] if nacionalidades else None,
+            "per_macid": rng.choices(macrosectores, pesos_macrosector)[0] if macrosectores else None,
+            "per_uniid": rng.choice(unidades) if unidades else None,
+        })
+    insertar(db, PersonaMayor, filas)
+    return ids(db, PersonaMayor, desde)
+
+
+def generar_especialistas(db, rng, cantidad):
+    print(f"🩺 Generating {cantidad} especialistas...")
+    especialidades = ids(db, Especialidad)
+    desde = db.scalar(select(func.max(Especialista.id))) or 0
+    base_rut = 20_000_000 + desde
+    filas = []
+    for i in range(cantidad):
+        numero = base_rut + i
+        filas.append({
+            "esp_rut": f"{numero}-{digito_verificador(numero)}",
+            "esp_nombre": rng.choice(NOMBRES_F + NOMBRES_M),
+            "esp_apellido": rng.choice(APELLIDOS),
+            "esp_espeid": rng.choice(especialidades) if especialidades else None,
+        })
+    insertar(db, Especialista, filas)
+    return ids(db, Especialista, desde)
+
+
+def generar_atenciones(db, rng, cantidad, personas, especialistas, hoy, dias):
+    print(f"📋 Generating {cantidad} atenciones...")
+    # Actividad por persona con cola larga; ~15% nunca fue atendida
+    pesos = [0 if rng.random() < 0.15 else rng.lognormvariate(0, 1) for _ in personas]
+    acumulados_personas = list(_acumular(pesos))
+    acumulados_especialistas = list(_acumular(rng.uniform(0.2, 2) for _ in especialistas))
+    generadas = 0
+    while generadas < cantidad:
+        n = min(LOTE, cantidad - generadas)
+        perids = rng.choices(personas, cum_weights=acumulados_personas, k=n)
+        espids = rng.choices(especialistas, cum_weights=acumulados_especialistas, k=n)
+        db.execute(insert(Atencion), [
+            # Más atenciones recientes que antiguas
+            {"at_perid": perid, "at_espid": espid, "at_fecha": hoy - timedelta(days=int(rng.triangular(0, dias, 0)))}
+            for perid, espid in zip(perids, espids)
+        ])
+        db.commit()
+        generadas += n
+        if generadas % (LOTE * 25) == 0 or generadas == cantidad:
+            print(f"   {generadas}/{cantidad}")
+
+
+def _acumular(pesos):
+    total = 0.0
+    for peso in pesos:
+        total += peso
+        yield total
+
+
+def generar_eventos(db, rng, personas, hoy, dias, actividades, talleres, viajes):
+    print(f"🎉 Generating {actividades} actividades, {talleres} talleres and {viajes} viajes with attendance...")
+    desde = {m: db.scalar(select(func.max(m.id))) or 0 for m in (Actividad, Talleres, Viaje)}
+    insertar(db, Actividad, [
+        {"act_actividad": f"Actividad {i + 1}", "act_fecha": hoy - timedelta(days=rng.randrange(dias))}
+        for i in range(actividades)
+    ])
+    insertar(db, Talleres, [{"tal_taller": f"Taller {i + 1}"} for i in range(talleres)])
+    insertar(db, Viaje, [
+        {"via_viaje": f"Viaje {i + 1}", "via_destino": rng.choice(["Valparaíso", "Viña del Mar", "Pichilemu", "Cajón del Maipo", "La Serena"]),
+         "via_fecha": hoy - timedelta(days=rng.randrange(dias))}
+        for i in range(viajes)
+    ])
+    for modelo, asistencia, persona_col, evento_col, minimo, maximo in (
+        (Actividad, ActividadAsistencia, "actasist_perid", "actasist_actid", 5, 80),
+        (Talleres, TallerAsistencia, "talasist_perid", "talasist_talid", 10, 30),
+        (Viaje, ViajeAsistencia, "viaasist_perid", "viaasist_viaid", 20, 45),
+    ):
+        filas = []
+        for evento_id in ids(db, modelo, desde[modelo]):
+            for persona_id in rng.sample(personas, min(len(personas), rng.randint(minimo, maximo))):
+                filas.append({persona_col: persona_id, evento_col: evento_id})
+        insertar(db, asistencia, filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--personas", type=int, default=200_000)
+    parser.add_argument("--atenciones", type=int, default=5_000_000)
+    parser.add_argument("--especialistas", type=int, default=300)
+    parser.add_argument("--actividades", type=int, default=2_000)
+    parser.add_argument("--talleres", type=int, default=100)
+    parser.add_argument("--viajes", type=int, default=300)
+    parser.add_argument("--years", type=int, default=5, help="span of attention dates")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Fecha fija para que la misma semilla genere los mismos datos cualquier día
+    hoy = date(2025, 6, 30)
+    dias = args.years * 365
+    inicio = time.perf_counter()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.scalar(select(func.count(Genero.id))):
+            init_reference_data(db)
+        if not db.scalar(select(func.count(User.id))):
+            create_admin_user(db)
+
+        personas = generar_personas(db, rng, args.personas, hoy)
+        especialistas = generar_especialistas(db, rng, args.especialistas)
+        generar_atenciones(db, rng, args.atenciones, personas, especialistas, hoy, dias)
+        generar_eventos(db, rng, personas, hoy, dias, args.actividades, args.talleres, args.viajes)
+
+        print("🔄 Rebuilding denormalized columns and summaries...")
+        crud_pm.reconstruir_ultimas_atenciones(db)
+        resumenes.reconstruir_resumenes(db)
+
+        print(f"✅ Benchmark data generated in {time.perf_counter() - inicio:.0f}s")
+    except Exception as e:
+        print(f"❌ Error generating data: {e}")
+        db.rollback()
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script to bulk import personas mayores from a CSV file
+
+Usage: python import_personas.py personas.csv
+"""
+import sys
+sys.path.append('.')
+
+from app.database import SessionLocal
+from app.crud.importacion import importar_personas_csv
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python import_personas.py <file.csv>")
+        return 1
+
+    db = SessionLocal()
+    try:
+        print(f"📥 Importing personas from {sys.argv[1]}...")
+        # utf-8-sig discards the BOM added by Excel
+        with open(sys.argv[1], encoding="utf-8-sig", newline="") as archivo:
+            resultado = importar_personas_csv(db, archivo)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"✅ {resultado.insertadas} persona(s) imported")
+    if resultado.ruts_duplicados:
+        print(f"⚠️  {len(resultado.ruts_duplicados)} duplicate RUT(s) skipped: {', '.join(resultado.ruts_duplicados[:20])}"
+              + (" ..." if len(resultado.ruts_duplicados) > 20 else ""))
+    if resultado.rechazadas:
+        print(f"⚠️  {len(resultado.rechazadas)} row(s) rejected:")
+        for fila in resultado.rechazadas:
+            print(f"   - line {fila.linea} ({fila.rut or 'no RUT'}): {fila.motivo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
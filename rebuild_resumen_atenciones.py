@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the per-persona attention summary tables from the attention history
+"""
+import sys
+sys.path.append('.')
+
+from app.database import SessionLocal
+from app.crud.resumenes import reconstruir_resumenes
+
+
+def main():
+    db = SessionLocal()
+    try:
+        print("🔄 Rebuilding attention summaries...")
+        personas = reconstruir_resumenes(db)
+        print(f"✅ Summaries rebuilt for {personas} persona(s) with attentions")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild per_mayores.per_ultima_atencion from the attention history
+"""
+import sys
+sys.path.append('.')
+
+from app.database import SessionLocal
+from app.crud.personas_mayores import reconstruir_ultimas_atenciones
+
+
+def main():
+    db = SessionLocal()
+    try:
+        print("🔄 Rebuilding last attention date for every persona...")
+        procesadas = reconstruir_ultimas_atenciones(db)
+        print(f"✅ {procesadas} persona(s) updated")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that slow queries are attributed to their app/crud function,
+for both the sync CRUD functions and the async variants (AsyncSession)
+
+Runs on its own temporary SQLite database, so it does not touch the configured one.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.consultas_lentas import registro
+from app.database import Base
+from app.models.personas_mayores import Especialista
+from app.crud import especialistas as crud_especialistas
+
+
+async def _consultar_async(url):
+    engine = create_async_engine(url)
+    try:
+        async with async_sessionmaker(engine)() as db:
+            await crud_especialistas.count_especialistas_async(db, "Soto")
+            await crud_especialistas.get_especialistas_async(db, limit=10)
+    finally:
+        await engine.dispose()
+
+
+def test_consultas_lentas():
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, "consultas_lentas.sqlite")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine)
+    umbral, explain = settings.consultas_lentas_umbral_ms, settings.consultas_lentas_explain
+    # Cualquier sentencia cuenta como lenta
+    settings.consultas_lentas_umbral_ms, settings.consultas_lentas_explain = 1e-9, False
+
+    try:
+        print("🔍 Testing slow query origins...")
+        with sessionmaker(bind=engine)() as db:
+            db.add(Especialista(esp_rut="1-9", esp_nombre="Ana", esp_apellido="Soto"))
+            db.commit()
+            # El INSERT de preparación no sale de app/ y quedaría como "desconocida"
+            registro.limpiar()
+            crud_especialistas.count_especialistas(db, "Soto")
+        asyncio.run(_consultar_async(f"sqlite+aiosqlite:///{ruta}"))
+
+        funciones = {funcion.rsplit(":", 1)[0] for _, funcion, _, _ in registro.recientes(registro.maximo)}
+        print(f"\n📋 Origins: {sorted(funciones)}")
+        for esperada in ("app.crud.especialistas.count_especialistas",
+                         "app.crud.especialistas.count_especialistas_async",
+                         "app.crud.especialistas.get_especialistas_async"):
+            assert esperada in funciones, f"{esperada} not in {funciones}"
+        assert "desconocida" not in funciones
+        print("✅ Sync and async queries are attributed to their CRUD function")
+    finally:
+        settings.consultas_lentas_umbral_ms, settings.consultas_lentas_explain = umbral, explain
+        registro.limpiar()
+        engine.dispose()
+        os.remove(ruta)
+        os.rmdir(directorio)
+
+
+if __name__ == "__main__":
+    test_consultas_lentas()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that the incremental attention summaries match a full rebuild
+
+Runs on its own temporary SQLite database, so it does not touch the configured one.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+sys.path.append('.')
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.personas_mayores import (
+    PersonaMayor, Especialista, Especialidad, ResumenAtenciones, ResumenAtencionesEspecialidad)
+from app.crud import especialistas as crud_especialistas
+from app.crud import personas_mayores as crud_pm
+from app.crud.resumenes import reconstruir_resumenes
+from app.schemas.especialistas import EspecialistaUpdate
+from app.schemas.personas_mayores import AtencionCreate
+
+
+def _contadores(db):
+    """Totales de ambas tablas de resumen; una fila en 0 equivale a no tener fila"""
+    totales = {
+        persona_id: total
+        for persona_id, total in db.execute(select(ResumenAtenciones.rap_perid, ResumenAtenciones.rap_total))
+        if total
+    }
+    por_especialidad = {
+        (persona_id, especialidad_id): total
+        for persona_id, especialidad_id, total in db.execute(select(
+            ResumenAtencionesEspecialidad.rae_perid, ResumenAtencionesEspecialidad.rae_espeid,
+            ResumenAtencionesEspecialidad.rae_total))
+        if total
+    }
+    return totales, por_especialidad
+
+
+def _verificar(db, etapa):
+    """Compara los contadores incrementales con los de reconstruir_resumenes"""
+    incrementales = _contadores(db)
+    reconstruir_resumenes(db)
+    reconstruidos = _contadores(db)
+    assert incrementales == reconstruidos, f"{etapa}: {incrementales} != {reconstruidos}"
+    assert all(total > 0 for total in incrementales[1].values()), f"{etapa}: contadores negativos"
+    print(f"✅ {etapa}: {sum(incrementales[0].values())} attentions, summaries match the rebuild")
+
+
+def _borrar_atenciones(db, azar, ids, cantidad):
+    for atencion_id in azar.sample(sorted(ids), cantidad):
+        crud_pm.delete_atencion(db, atencion_id)
+        ids.discard(atencion_id)
+
+
+async def _especialistas_async(url, reasignado, especialidad_id, borrado):
+    engine = create_async_engine(url)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            await crud_especialistas.update_especialista_async(
+                db, reasignado, EspecialistaUpdate(esp_espeid=especialidad_id))
+            await crud_especialistas.delete_especialista_async(db, borrado)
+    finally:
+        await engine.dispose()
+
+
+def test_resumenes():
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, "resumenes.sqlite")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    azar = random.Random(42)
+
+    try:
+        print("🔍 Testing incremental attention summaries...")
+
+        especialidades = [Especialidad(espe_especialidad=n) for n in ("Medicina General", "Kinesiología")]
+        db.add_all(especialidades)
+        db.flush()
+        especialistas = [
+            Especialista(esp_rut="1-9", esp_nombre="Ana", esp_apellido="Soto", esp_espeid=especialidades[0].id),
+            Especialista(esp_rut="2-7", esp_nombre="Luis", esp_apellido="Rojas", esp_espeid=especialidades[1].id),
+            Especialista(esp_rut="4-3", esp_nombre="Juan", esp_apellido="Vera", esp_espeid=especialidades[1].id),
+            # Sin especialidad: solo cuenta en el total de la persona
+            Especialista(esp_rut="3-5", esp_nombre="Eva", esp_apellido="Pino"),
+        ]
+        personas = [
+            PersonaMayor(per_rut=f"{10_000_000 + i}-{i}", per_nombre="Persona", per_apellido=str(i),
+                         per_birthdate=date(1950, 1, 1))
+            for i in range(5)
+        ]
+        db.add_all(especialistas + personas)
+        db.commit()
+        ids_especialidades = [e.id for e in especialidades]
+        ids_especialistas = [e.id for e in especialistas]
+
+        # Altas con y sin especialista, y bajas de una parte de ellas
+        atenciones = set()
+        for _ in range(200):
+            especialista_id = azar.choice(ids_especialistas + [None])
+            atenciones.add(crud_pm.create_atencion(db, AtencionCreate(
+                at_perid=azar.choice(personas).id,
+                at_espid=especialista_id,
+                at_fecha=date(2024, 1, 1) + timedelta(days=azar.randrange(365)),
+            )).id)
+        _borrar_atenciones(db, azar, atenciones, 80)
+        _verificar(db, "Create and delete attentions")
+
+        # El especialista cambia de especialidad y después se borran atenciones suyas
+        crud_especialistas.update_especialista(
+            db, ids_especialistas[0], EspecialistaUpdate(esp_espeid=ids_especialidades[1]))
+        crud_especialistas.update_especialista(db, ids_especialistas[1], EspecialistaUpdate(esp_espeid=None))
+        _borrar_atenciones(db, azar, atenciones, 20)
+        _verificar(db, "Reassign specialists")
+
+        # Borrar un especialista deja sus atenciones sin especialidad
+        crud_especialistas.delete_especialista(db, ids_especialistas[2])
+        _borrar_atenciones(db, azar, atenciones, 20)
+        _verificar(db, "Delete a specialist")
+
+        # Las mismas operaciones con las variantes asíncronas
+        asyncio.run(_especialistas_async(
+            f"sqlite+aiosqlite:///{ruta}", ids_especialistas[3], ids_especialidades[0], ids_especialistas[0]))
+        db.expire_all()
+        _borrar_atenciones(db, azar, atenciones, 20)
+        _verificar(db, "Reassign and delete specialists (async)")
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(ruta)
+        os.rmdir(directorio)
+
+
+if __name__ == "__main__":
+    test_resumenes()